@@ -1,4 +1,3 @@
-from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,34 +5,42 @@ from sqlalchemy import select
 from jose import JWTError, jwt
 
 from app.core.config import settings
-from app.core.security import verify_password
 from app.db.session import get_db
 from app.models.user import User
-from app.schemas.user import TokenData
+from app.schemas.user import TokenData, Principal
 
 # OAuth2密码流配置
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
-async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
-    """获取当前用户"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+async def get_current_principal(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    """从令牌中解析当前用户身份（无需查询数据库）"""
+    credentials_exception = _credentials_exception()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, user_id=payload.get("uid"))
     except JWTError:
         raise credentials_exception
     
-    result = await db.execute(select(User).where(User.username == token_data.username))
-    user = result.scalars().first()
-    if user is None:
+    if token_data.user_id is not None:
+        return Principal(id=token_data.user_id, username=token_data.username)
+    
+    # 兼容不含用户ID的旧令牌
+    result = await db.execute(select(User.id).where(User.username == token_data.username))
+    user_id = result.scalar()
+    if user_id is None:
         raise credentials_exception
     
-    return user
+    return Principal(id=user_id, username=token_data.username)
+
@@ -1,58 +1,96 @@
+import re
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
 
-from app.core.config import settings
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_and_rehash_password_async
 from app.db.session import get_db
-from app.crud.user import get_user_by_username, get_user_by_email, create_user
-from app.schemas.user import UserCreate, UserResponse, Token
+from app.crud.user import get_user_by_username, create_user, update_user_password_hash
+from app.schemas.user import UserCreate, UserResponse, Token, RefreshTokenRequest
+from app.services.auth import issue_tokens, rotate_refresh_token, revoke_token
 
 router = APIRouter()
 
+# 邮箱的唯一索引（SQLite 对列索引报告“表.列”）
+EMAIL_CONSTRAINTS = {"ix_users_email", "ix_users_email_lower", "users.email"}
+
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     """用户注册"""
-    # 检查用户名是否已存在
-    existing_user = await get_user_by_username(db, username=user_in.username)
-    if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already registered"
-        )
-    
-    # 检查邮箱是否已存在
-    existing_email = await get_user_by_email(db, email=user_in.email)
-    if existing_email:
+    # 直接插入，由用户名、邮箱的唯一索引判断是否重复（并发注册同样安全）
+    try:
+        user = await create_user(db, user_in=user_in)
+    except IntegrityError as exc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
+            detail=_registration_conflict(exc)
         )
-    
-    # 创建新用户
-    user = await create_user(db, user_in=user_in)
     return user
 
 
+def _violated_constraint(exc: IntegrityError) -> str:
+    """违反的唯一约束名称"""
+    # asyncpg 直接提供约束（索引）名称
+    name = getattr(exc.orig.__cause__, "constraint_name", None)
+    if name:
+        return name
+    # SQLite 只在错误信息中给出：列索引为“表.列”，表达式索引为 index '索引名'
+    match = re.search(r"UNIQUE constraint failed: (?:index '(\w+)'|([\w.]+))", str(exc.orig))
+    return (match.group(1) or match.group(2)) if match else ""
+
+
+def _registration_conflict(exc: IntegrityError) -> str:
+    """按违反的唯一约束判断重复的是邮箱还是用户名（错误信息中的用户名等取值可能包含 email 字样）"""
+    if _violated_constraint(exc) in EMAIL_CONSTRAINTS:
+        return "Email already registered"
+    return "Username already registered"
+
+
 @router.post("/login", response_model=Token)
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """用户登录"""
     # 查找用户
     user = await get_user_by_username(db, username=form_data.username)
-    if not user or not verify_password(form_data.password, user.password_hash):
+    user_id, username, password_hash = (user.id, user.username, user.password_hash) if user else (None, None, None)
+    # 结束只读事务、归还连接，避免在耗时的密码验证期间占用连接池
+    await db.rollback()
+    
+    verified, new_hash = (False, None)
+    if password_hash:
+        verified, new_hash = await verify_and_rehash_password_async(form_data.password, password_hash)
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # 创建访问令牌
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username},
-        expires_delta=access_token_expires
-    )
+    # 哈希方案或成本参数已调整时，用本次登录的明文密码重新哈希
+    if new_hash:
+        await update_user_password_hash(db, user_id=user_id, password_hash=new_hash)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    # 创建访问令牌与刷新令牌
+    return await issue_tokens(db, user_id=user_id, username=username)
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(token_in: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    """使用刷新令牌换取新的访问令牌（刷新令牌同时轮换）"""
+    token = await rotate_refresh_token(db, token_in.refresh_token)
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token
+
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke(token_in: RefreshTokenRequest, db: AsyncSession = Depends(get_db)):
+    """吊销刷新令牌（如退出登录）"""
+    await revoke_token(db, token_in.refresh_token)
+    return None
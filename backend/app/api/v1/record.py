@@ -1,55 +1,179 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, Body
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional
+from typing import List, Optional, Any
 from datetime import date
+from pydantic import TypeAdapter
 
-from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
+from app.core.config import settings
+from app.db.session import get_db, get_read_db, ReadSessionLocal
+from app.api.deps import get_current_principal
+from app.schemas.user import Principal
 from app.crud.record import (
-    get_record, get_records, get_records_by_date_range, 
-    create_record, update_record, delete_record
+    get_record, get_records, get_records_by_date_range, stream_records_by_date_range,
+    delete_record, record_list_columns, RECORD_LIST_FIELDS, RECORD_TASK_FIELDS
 )
-from app.schemas.record import StudyRecordCreate, StudyRecordUpdate, StudyRecordResponse
+from app.schemas.record import (
+    StudyRecordCreate, StudyRecordUpdate, StudyRecordResponse, StudyRecordBulkResponse, StudyRecordRow,
+    StudyRecordWithTaskRow
+)
+from app.services.record import create_record, update_record, bulk_create_records
+from app.services.stats import invalidate_user_stats
+from app.utils.cursor import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.utils.serialization import json_rows_response, parse_fields, row_dicts
+from app.utils.streaming import iter_json_array
 
 router = APIRouter()
 
+_record_rows = TypeAdapter(List[StudyRecordRow])
+_record_row = TypeAdapter(StudyRecordRow)
+_record_task_rows = TypeAdapter(List[StudyRecordWithTaskRow])
+_record_task_row = TypeAdapter(StudyRecordWithTaskRow)
+
+
+async def _stream_records(
+    user_id: int, start_date: date, end_date: date, fields: Optional[List[str]] = None, expand_task: bool = False
+):
+    """流式输出指定日期范围内学习记录的JSON数组"""
+    row_adapter = _record_task_row if expand_task else _record_row
+    
+    def encode(row) -> bytes:
+        return row_adapter.dump_json(row_dicts((row,), fields)[0])
+    
+    # 依赖注入的会话在响应发送前即被关闭，流式输出需使用独立的只读会话
+    async with ReadSessionLocal() as db:
+        records = stream_records_by_date_range(
+            db, user_id=user_id, start_date=start_date, end_date=end_date,
+            chunk_size=settings.RECORDS_STREAM_CHUNK_SIZE, columns=record_list_columns(fields, expand_task)
+        )
+        async for chunk in iter_json_array(records, encode, settings.RECORDS_STREAM_CHUNK_SIZE):
+            yield chunk
+
 
 @router.post("/", response_model=StudyRecordResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_record(
     record_in: StudyRecordCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """创建新的学习记录"""
-    return await create_record(db, record_in=record_in, user_id=current_user.id)
+    try:
+        record = await create_record(db, record_in=record_in, user_id=current_user.id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    invalidate_user_stats(current_user.id)
+    return record
+
+
+@router.post("/bulk", response_model=StudyRecordBulkResponse)
+async def create_records_in_bulk(
+    items: List[Any] = Body(..., description="待创建的学习记录列表（格式同单条创建）"),
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """批量创建学习记录（单个事务，逐条返回结果）"""
+    if len(items) > settings.RECORDS_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.RECORDS_BULK_MAX_ITEMS} records per request"
+        )
+    result = await bulk_create_records(db, items=items, user_id=current_user.id)
+    if result.created:
+        invalidate_user_stats(current_user.id)
+    return result
 
 
 @router.get("/", response_model=List[StudyRecordResponse])
 async def read_records(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="分页游标（取自上一页响应头X-Next-Cursor）"),
     start: Optional[date] = Query(None, description="开始日期"),
     end: Optional[date] = Query(None, description="结束日期"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    stream: bool = Query(False, description="按日期范围查询时以流式JSON数组返回全部记录"),
+    fields: Optional[str] = Query(None, description="只返回指定字段（逗号分隔），如 record_date,duration"),
+    expand: Optional[str] = Query(None, description="expand=task 时在同一查询中附带所属任务的标题、优先级与状态"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """获取学习记录（可按日期范围过滤）"""
-    if start and end:
-        if start > end:
+    """获取学习记录（可按日期范围过滤，支持游标分页、稀疏字段集与展开所属任务）"""
+    if start and end and start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date must be before end date"
+        )
+    
+    if expand is not None and expand != "task":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown expand: {expand}"
+        )
+    expand_task = expand == "task"
+    
+    try:
+        selected = parse_fields(fields, RECORD_LIST_FIELDS + (RECORD_TASK_FIELDS if expand_task else ()))
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    
+    if stream and not (start and end):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Streaming requires both start and end dates"
+        )
+    
+    if stream:
+        return StreamingResponse(
+            _stream_records(current_user.id, start, end, selected, expand_task),
+            media_type="application/json"
+        )
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, date, int)
+        except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Start date must be before end date"
+                detail="Invalid cursor"
             )
-        return await get_records_by_date_range(db, user_id=current_user.id, start_date=start, end_date=end)
-    return await get_records(db, user_id=current_user.id, skip=skip, limit=limit)
+    
+    if start and end:
+        # 日期范围查询每页最多返回RECORDS_RANGE_MAX_ROWS条，超出部分通过游标继续获取
+        limit = min(limit, settings.RECORDS_RANGE_MAX_ROWS)
+        records = await get_records_by_date_range(
+            db, user_id=current_user.id, start_date=start, end_date=end, limit=limit, after=after,
+            columns=record_list_columns(selected, expand_task)
+        )
+    else:
+        records = await get_records(
+            db, user_id=current_user.id, skip=skip, limit=limit, after=after,
+            columns=record_list_columns(selected, expand_task)
+        )
+    
+    # 本页已满时返回下一页游标
+    if records and len(records) == limit:
+        last = records[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.record_date, last.id)
+    # 展开任务与稀疏字段集都与响应模型不一致，总是直接序列化
+    if expand_task:
+        return json_rows_response(_record_task_rows, records, response, selected)
+    if settings.FAST_JSON_LISTS or selected is not None:
+        return json_rows_response(_record_rows, records, response, selected)
+    return records
 
 
 @router.get("/{record_id}", response_model=StudyRecordResponse)
 async def read_record(
     record_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """获取单个学习记录"""
     record = await get_record(db, record_id=record_id, user_id=current_user.id)
@@ -66,15 +190,22 @@ async def update_existing_record(
     record_id: int,
     record_in: StudyRecordUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """更新学习记录"""
-    record = await update_record(db, record_id=record_id, record_in=record_in, user_id=current_user.id)
+    try:
+        record = await update_record(db, record_id=record_id, record_in=record_in, user_id=current_user.id)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
     if not record:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Study record not found"
         )
+    invalidate_user_stats(current_user.id)
     return record
 
 
@@ -82,7 +213,7 @@ async def update_existing_record(
 async def delete_existing_record(
     record_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """删除学习记录"""
     success = await delete_record(db, record_id=record_id, user_id=current_user.id)
@@ -91,4 +222,5 @@ async def delete_existing_record(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Study record not found"
         )
+    invalidate_user_stats(current_user.id)
     return None
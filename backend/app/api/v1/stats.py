@@ -3,11 +3,14 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import date, timedelta
 
-from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
-from app.services.stats import get_daily_stats, get_task_stats, get_total_stats, get_weekly_stats
-from app.schemas.stats import DailyStats, TaskStats, TotalStats
+from app.db.session import get_read_db
+from app.api.deps import get_current_principal
+from app.schemas.user import Principal
+from app.services.stats import (
+    get_daily_stats, get_task_stats, get_total_stats, get_weekly_stats,
+    get_cached_stats, get_weekly_date_range
+)
+from app.schemas.stats import DailyStats, TaskStats, TotalStats, StatsResponse
 
 router = APIRouter()
 
@@ -16,8 +19,8 @@ router = APIRouter()
 async def read_daily_stats(
     start_date: Optional[date] = Query(None, description="开始日期"),
     end_date: Optional[date] = Query(None, description="结束日期"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """获取每日学习统计"""
     # 默认查询最近30天
@@ -34,15 +37,18 @@ async def read_daily_stats(
             detail="Start date must be before end date"
         )
     
-    return await get_daily_stats(db, user_id=current_user.id, start_date=start_date, end_date=end_date)
+    return await get_cached_stats(
+        current_user.id, "daily", start_date, end_date,
+        lambda: get_daily_stats(db, user_id=current_user.id, start_date=start_date, end_date=end_date)
+    )
 
 
 @router.get("/task", response_model=list[TaskStats])
 async def read_task_stats(
     start_date: Optional[date] = Query(None, description="开始日期"),
     end_date: Optional[date] = Query(None, description="结束日期"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """获取任务学习时间统计"""
     # 默认查询最近30天
@@ -59,15 +65,18 @@ async def read_task_stats(
             detail="Start date must be before end date"
         )
     
-    return await get_task_stats(db, user_id=current_user.id, start_date=start_date, end_date=end_date)
+    return await get_cached_stats(
+        current_user.id, "task", start_date, end_date,
+        lambda: get_task_stats(db, user_id=current_user.id, start_date=start_date, end_date=end_date)
+    )
 
 
 @router.get("/total", response_model=TotalStats)
 async def read_total_stats(
     start_date: Optional[date] = Query(None, description="开始日期"),
     end_date: Optional[date] = Query(None, description="结束日期"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """获取总学习统计"""
     # 默认查询最近30天
@@ -84,14 +93,21 @@ async def read_total_stats(
             detail="Start date must be before end date"
         )
     
-    return await get_total_stats(db, user_id=current_user.id, start_date=start_date, end_date=end_date)
+    return await get_cached_stats(
+        current_user.id, "total", start_date, end_date,
+        lambda: get_total_stats(db, user_id=current_user.id, start_date=start_date, end_date=end_date)
+    )
 
 
-@router.get("/weekly")
+@router.get("/weekly", response_model=StatsResponse)
 async def read_weekly_stats(
     weeks: int = Query(4, ge=1, le=52, description="查询周数"),
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """获取最近几周的学习统计"""
-    return await get_weekly_stats(db, user_id=current_user.id, weeks=weeks)
+    start_date, end_date = get_weekly_date_range(weeks)
+    return await get_cached_stats(
+        current_user.id, "weekly", start_date, end_date,
+        lambda: get_weekly_stats(db, user_id=current_user.id, weeks=weeks)
+    )
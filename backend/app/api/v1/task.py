@@ -1,21 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Optional
+from datetime import datetime
+from pydantic import TypeAdapter
 
-from app.db.session import get_db
-from app.api.deps import get_current_user
-from app.models.user import User
-from app.crud.task import get_task, get_tasks, create_task, update_task, delete_task
-from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse
+from app.core.config import settings
+from app.db.session import get_db, get_read_db
+from app.api.deps import get_current_principal
+from app.schemas.user import Principal
+from app.crud.task import get_task, get_tasks, create_task, update_task, delete_task, task_list_columns, TASK_LIST_FIELDS
+from app.schemas.task import TaskCreate, TaskUpdate, TaskResponse, TaskRow
+from app.services.stats import invalidate_user_stats
+from app.utils.cursor import encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from app.utils.serialization import json_rows_response, parse_fields
 
 router = APIRouter()
 
+_task_rows = TypeAdapter(List[TaskRow])
+
 
 @router.post("/", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_task(
     task_in: TaskCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """创建新任务"""
     return await create_task(db, task_in=task_in, user_id=current_user.id)
@@ -23,20 +31,51 @@ async def create_new_task(
 
 @router.get("/", response_model=List[TaskResponse])
 async def read_tasks(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="分页游标（取自上一页响应头X-Next-Cursor）"),
+    fields: Optional[str] = Query(None, description="只返回指定字段（逗号分隔），如 id,title,status"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """获取用户的所有任务"""
-    return await get_tasks(db, user_id=current_user.id, skip=skip, limit=limit)
+    """获取用户的所有任务（支持游标分页与稀疏字段集）"""
+    try:
+        selected = parse_fields(fields, TASK_LIST_FIELDS)
+    except ValueError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(exc)
+        )
+    
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, int)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+    
+    tasks = await get_tasks(
+        db, user_id=current_user.id, skip=skip, limit=limit, after=after, columns=task_list_columns(selected)
+    )
+    # 本页已满时返回下一页游标
+    if tasks and len(tasks) == limit:
+        last = tasks[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    # 稀疏字段集与响应模型不一致，总是直接序列化
+    if settings.FAST_JSON_LISTS or selected is not None:
+        return json_rows_response(_task_rows, tasks, response, selected)
+    return tasks
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def read_task(
     task_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """获取单个任务"""
     task = await get_task(db, task_id=task_id, user_id=current_user.id)
@@ -53,7 +92,7 @@ async def update_existing_task(
     task_id: int,
     task_in: TaskUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """更新任务"""
     task = await update_task(db, task_id=task_id, task_in=task_in, user_id=current_user.id)
@@ -62,6 +101,9 @@ async def update_existing_task(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    # 任务统计中包含任务标题
+    if "title" in task_in.model_fields_set:
+        invalidate_user_stats(current_user.id)
     return task
 
 
@@ -69,7 +111,7 @@ async def update_existing_task(
 async def delete_existing_task(
     task_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """删除任务"""
     success = await delete_task(db, task_id=task_id, user_id=current_user.id)
@@ -78,4 +120,6 @@ async def delete_existing_task(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Task not found"
         )
+    # 已删除的任务不再出现在任务统计中
+    invalidate_user_stats(current_user.id)
     return None
@@ -0,0 +1,91 @@
+"""StudyTracker 管理命令
+
+用法: python -m app.cli <command> [options]
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.db.session import engine, SessionLocal
+from app.db.migrate import get_schema_version, upgrade, LATEST_VERSION
+from app.core.config import settings
+from app.core.security import build_crypt_context, ROUNDS_SETTINGS
+from app.crud.rollup import rebuild_daily_totals, rebuild_task_totals
+
+
+async def migrate(args: argparse.Namespace) -> None:
+    """执行尚未应用的数据库结构迁移"""
+    if not args.status:
+        applied = await upgrade(engine, target=args.target)
+        for migration in applied:
+            print(f"Applied {migration.version}: {migration.description}")
+    print(f"Schema version {await get_schema_version(engine)}, latest {LATEST_VERSION}")
+
+
+async def rebuild_rollups(args: argparse.Namespace) -> None:
+    """根据学习记录重建统计汇总表"""
+    # 确保汇总表存在
+    await upgrade(engine)
+    
+    async with SessionLocal() as db:
+        await rebuild_daily_totals(db, user_id=args.user_id)
+        await rebuild_task_totals(db, user_id=args.user_id)
+        await db.commit()
+    
+    target = f"user {args.user_id}" if args.user_id is not None else "all users"
+    print(f"Rebuilt rollup tables for {target}")
+
+
+def _measure_hash_rate(scheme: str, rounds: int, duration: float) -> float:
+    """在单个进程内测量每秒可完成的哈希次数"""
+    context = build_crypt_context([scheme], {scheme: rounds})
+    count = 0
+    start = time.perf_counter()
+    while True:
+        context.hash("benchmark-password")
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return count / elapsed
+
+
+async def bench_hash(args: argparse.Namespace) -> None:
+    """测量各候选哈希方案与成本参数下每核每秒的哈希次数"""
+    cores = os.cpu_count() or 1
+    print(f"{'scheme':<15} {'rounds':>8} {'ms/hash':>10} {'hashes/s/core':>14} {'hashes/s total':>15}")
+    for scheme in args.schemes:
+        if scheme not in ROUNDS_SETTINGS:
+            print(f"{scheme:<15} unsupported scheme, choose from: {', '.join(ROUNDS_SETTINGS)}")
+            continue
+        for rounds in args.rounds or [getattr(settings, ROUNDS_SETTINGS[scheme])]:
+            rate = _measure_hash_rate(scheme, rounds, args.duration)
+            print(f"{scheme:<15} {rounds:>8} {1000 / rate:>10.1f} {rate:>14.1f} {rate * cores:>15.1f}")
+    print(f"total assumes {cores} cores fully used by the password hash pool")
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="StudyTracker management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    migrate_parser = subparsers.add_parser("migrate", help="apply pending database schema migrations")
+    migrate_parser.add_argument("--target", type=int, default=None, help="stop after the given schema version")
+    migrate_parser.add_argument("--status", action="store_true", help="only print the current schema version")
+    migrate_parser.set_defaults(handler=migrate)
+    
+    rebuild_parser = subparsers.add_parser("rebuild-rollups", help="rebuild statistics rollup tables from study records")
+    rebuild_parser.add_argument("--user-id", type=int, default=None, help="only rebuild the given user")
+    rebuild_parser.set_defaults(handler=rebuild_rollups)
+    
+    bench_parser = subparsers.add_parser("bench-hash", help="benchmark password hashing cost settings")
+    bench_parser.add_argument("--schemes", nargs="+", default=settings.PASSWORD_HASH_SCHEMES[:1], help="hash schemes to measure")
+    bench_parser.add_argument("--rounds", nargs="+", type=int, default=None, help="cost settings to measure (defaults to the configured value)")
+    bench_parser.add_argument("--duration", type=float, default=2.0, help="seconds to measure each setting")
+    bench_parser.set_defaults(handler=bench_hash)
+    
+    args = parser.parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
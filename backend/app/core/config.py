@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, Literal, List
 
 
 class Settings(BaseSettings):
@@ -10,11 +10,85 @@ class Settings(BaseSettings):
     
     # 数据库配置
     DATABASE_URL: str = "sqlite+aiosqlite:///./study_tracker.db"
+    # 启动时结构版本落后则自动执行迁移（多进程部署时建议关闭，改为部署前执行 python -m app.cli migrate）
+    DB_AUTO_MIGRATE: bool = True
+    # 只读副本的连接URL，用于统计与列表查询；为空时 SQLite 以只读模式打开同一文件，其他数据库以独立的只读连接池连接主库
+    DATABASE_READ_URL: Optional[str] = None
+    
+    # 连接池配置（SQLite 以外的数据库）
+    # 连接池保持的连接数
+    DB_POOL_SIZE: int = 5
+    # 连接池满时允许额外创建的连接数
+    DB_MAX_OVERFLOW: int = 10
+    # 连接的最长复用时间（秒），避免使用被服务端或中间代理关闭的连接
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    # 取出连接前先检测是否可用
+    DB_POOL_PRE_PING: bool = True
+    # 只读连接池（统计与列表查询）保持的连接数与溢出连接数，与写连接池分开计算
+    DB_READ_POOL_SIZE: int = 5
+    DB_READ_MAX_OVERFLOW: int = 10
+    # asyncpg 每个连接缓存的预编译语句数（经 PgBouncer 事务模式连接时设为 0）
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    
+    # 写入队列：全部写操作由单个后台任务串行执行，同时到达的写操作合并为一次提交（缓解 SQLite 写锁争用）
+    DB_WRITE_QUEUE: bool = False
+    # 每次合并提交的最大写操作数
+    DB_WRITE_QUEUE_MAX_BATCH: int = 100
+    
+    # 数据库被占用（SQLite busy / locked）时写操作的重试截止时间（毫秒，0 表示不重试）
+    DB_LOCK_RETRY_DEADLINE_MS: int = 10000
+    # 重试的初始与最大退避时间（毫秒），每次重试退避时间翻倍并加入随机抖动
+    DB_LOCK_RETRY_BASE_DELAY_MS: int = 10
+    DB_LOCK_RETRY_MAX_DELAY_MS: int = 1000
+    
+    # SQLite连接参数：wal 为 WAL 日志等并发读写配置，off 保持 SQLite 默认值
+    SQLITE_PRAGMA_PROFILE: Literal["wal", "off"] = "wal"
+    # 内存映射读取的最大字节数
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    # 每个连接的页缓存大小（负数表示KiB）
+    SQLITE_CACHE_SIZE: int = -64 * 1024
+    # 等待数据库锁的最长时间（毫秒）
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     
     # JWT配置
     SECRET_KEY: str = "your-secret-key-here-change-this-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    
+    # 密码哈希配置
+    # 哈希方案：首个方案用于新密码，其余方案仅用于验证，旧哈希在登录成功后自动升级
+    PASSWORD_HASH_SCHEMES: List[str] = ["bcrypt"]
+    # 各方案的成本参数（与配置不一致的已有哈希会在登录成功后重新生成）
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_PBKDF2_SHA256_ROUNDS: int = 29000
+    PASSWORD_SHA512_CRYPT_ROUNDS: int = 656000
+    # 密码哈希进程池的进程数（0表示使用CPU核数）
+    PASSWORD_HASH_WORKERS: int = 0
+    # 同时进行的密码哈希数上限，超出的请求排队等待（0表示与进程数相同）
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 0
+    
+    # 测试模式：单个请求允许执行的最大SQL语句数，超出时请求失败（0 表示关闭，写入队列中执行的语句不计入）
+    QUERY_COUNT_LIMIT: int = 0
+    
+    # 列表接口配置
+    # 只查询所需列，并由查询结果行直接序列化为JSON（跳过逐行的响应模型校验）
+    FAST_JSON_LISTS: bool = True
+    
+    # 学习记录配置
+    # 按日期范围查询时单页最多返回的记录数，超出部分需通过游标分页获取
+    RECORDS_RANGE_MAX_ROWS: int = 1000
+    # 流式返回学习记录时每批读取与输出的记录数
+    RECORDS_STREAM_CHUNK_SIZE: int = 500
+    # 批量创建学习记录时单次请求最多包含的记录数
+    RECORDS_BULK_MAX_ITEMS: int = 5000
+    
+    # 统计配置
+    # 周统计查询策略：cte（单条语句完成）或 concurrent（三个独立会话并发查询）
+    STATS_WEEKLY_STRATEGY: Literal["cte", "concurrent"] = "cte"
+    # 统计结果缓存的最大条目数（0表示关闭缓存）与过期时间（秒）
+    STATS_CACHE_MAX_SIZE: int = 10000
+    STATS_CACHE_TTL_SECONDS: float = 60
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,14 @@
+from typing import Callable, Dict
+
+# 各组件注册的指标采集函数
+_collectors: Dict[str, Callable[[], dict]] = {}
+
+
+def register_collector(name: str, collector: Callable[[], dict]) -> None:
+    """注册指标采集函数，/metrics 接口会汇总所有已注册的指标"""
+    _collectors[name] = collector
+
+
+def collect_metrics() -> Dict[str, dict]:
+    """采集当前进程的全部指标"""
+    return {name: collector() for name, collector in _collectors.items()}
@@ -1,24 +1,143 @@
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, List, Tuple
 
 from .config import settings
+from .metrics import register_collector
+
+# 支持配置成本参数的哈希方案及其对应的设置项
+ROUNDS_SETTINGS = {
+    "bcrypt": "PASSWORD_BCRYPT_ROUNDS",
+    "pbkdf2_sha256": "PASSWORD_PBKDF2_SHA256_ROUNDS",
+    "sha512_crypt": "PASSWORD_SHA512_CRYPT_ROUNDS",
+}
+
+
+def build_crypt_context(schemes: List[str], rounds: Optional[dict] = None) -> CryptContext:
+    """构造密码加密上下文：首个方案用于新哈希，其余方案仅用于验证旧哈希"""
+    options = {}
+    for scheme, value in (rounds or {}).items():
+        if scheme in schemes:
+            # 成本参数与配置不一致的哈希视为过时，登录成功后重新哈希
+            options[f"{scheme}__default_rounds"] = value
+            options[f"{scheme}__min_rounds"] = value
+            options[f"{scheme}__max_rounds"] = value
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
 
 # 密码加密上下文
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = build_crypt_context(
+    settings.PASSWORD_HASH_SCHEMES,
+    {scheme: getattr(settings, name) for scheme, name in ROUNDS_SETTINGS.items()}
+)
+
+
+def _prepare_password(password: str, scheme: Optional[str]):
+    """按哈希方案处理明文密码：bcrypt只使用前72字节，其余方案使用完整密码"""
+    if scheme == "bcrypt":
+        # bcrypt限制密码长度为72字节，哈希与验证都按字节截断，保证两者一致
+        return password.encode("utf-8")[:72]
+    return password
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
-    return pwd_context.verify(plain_password, hashed_password)
+    scheme = pwd_context.identify(hashed_password, required=False)
+    return pwd_context.verify(_prepare_password(plain_password, scheme), hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """生成密码哈希"""
-    # bcrypt限制密码长度为72字节，超过则截断
-    password = password[:72]
-    return pwd_context.hash(password)
+    return pwd_context.hash(_prepare_password(password, pwd_context.default_scheme()))
+
+
+def verify_and_rehash_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """验证密码；若哈希方案或成本参数已过时，同时返回按当前配置生成的新哈希"""
+    if not verify_password(plain_password, hashed_password):
+        return False, None
+    if pwd_context.needs_update(hashed_password):
+        return True, get_password_hash(plain_password)
+    return True, None
+
+
+class _HashPool:
+    """在独立进程池中执行密码哈希，避免阻塞事件循环并利用多核"""
+
+    def __init__(self, workers: int, max_concurrency: int):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def run(self, func, *args):
+        """排队等待空闲名额后在进程池中执行func"""
+        if self._executor is None:
+            # 使用spawn启动子进程，避免fork继承事件循环与数据库连接线程
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        self.waiting += 1
+        async with self._semaphore:
+            self.waiting -= 1
+            self.in_flight += 1
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+            finally:
+                self.in_flight -= 1
+                self.completed += 1
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphore = None
+
+    def stats(self) -> dict:
+        """进程池运行指标"""
+        return {
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+
+_hash_workers = settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1
+hash_pool = _HashPool(
+    workers=_hash_workers,
+    max_concurrency=settings.PASSWORD_HASH_MAX_CONCURRENCY or _hash_workers
+)
+register_collector("password_hashing", hash_pool.stats)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在进程池中验证密码"""
+    return await hash_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def verify_and_rehash_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """在进程池中验证密码，并在需要时生成新哈希"""
+    return await hash_pool.run(verify_and_rehash_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """在进程池中生成密码哈希"""
+    return await hash_pool.run(get_password_hash, password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -33,6 +152,16 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def generate_refresh_token() -> str:
+    """生成随机刷新令牌"""
+    return secrets.token_urlsafe(32)
+
+
+def hash_token(token: str) -> str:
+    """计算令牌的SHA-256哈希（数据库中只保存哈希值）"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
 def decode_access_token(token: str) -> dict:
     """解码访问令牌"""
     try:
@@ -1,10 +1,77 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple, AsyncIterator, Sequence, Any
+from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func
+from sqlalchemy import select, insert, update, delete, and_, func, tuple_
+from sqlalchemy.orm import selectinload
 from datetime import date
 
+from app.db.writer import run_write
 from app.models.record import StudyRecord
+from app.models.task import Task
 from app.schemas.record import StudyRecordCreate, StudyRecordUpdate
+from app.crud.rollup import apply_daily_delta, apply_task_delta, apply_daily_deltas, apply_task_deltas, retract_record
+
+# 列表接口查询的列
+RECORD_LIST_COLUMNS = (
+    StudyRecord.task_id, StudyRecord.record_date, StudyRecord.duration,
+    StudyRecord.id, StudyRecord.user_id, StudyRecord.created_at
+)
+# 展开任务（expand=task）时附加的所属任务字段
+RECORD_TASK_COLUMNS = (
+    Task.title.label("task_title"),
+    Task.priority.label("task_priority"),
+    Task.status.label("task_status")
+)
+# 列表接口可选择的字段
+RECORD_LIST_FIELDS = tuple(column.key for column in RECORD_LIST_COLUMNS)
+RECORD_TASK_FIELDS = tuple(column.key for column in RECORD_TASK_COLUMNS)
+
+
+def record_list_columns(fields: Optional[Sequence[str]] = None, expand_task: bool = False) -> Tuple[Any, ...]:
+    """列表查询的列：未指定字段时为全部列表字段（expand_task时包括所属任务字段），否则为所选字段加上游标分页使用的列"""
+    columns = RECORD_LIST_COLUMNS + (RECORD_TASK_COLUMNS if expand_task else ())
+    if fields is None:
+        return columns
+    return tuple(
+        column for column in columns
+        if column.key in fields or column.key in ("record_date", "id")
+    )
+
+
+def _select_records(columns: Optional[Sequence[Any]] = None):
+    """查询完整的学习记录，或只查询指定的列（包含任务字段时在同一查询中连接任务表）"""
+    if columns is None:
+        return select(StudyRecord)
+    
+    stmt = select(*columns).select_from(StudyRecord)
+    if any(column.key in RECORD_TASK_FIELDS for column in columns):
+        # 左连接：所属任务已被删除（或不属于记录的用户）时记录仍然返回，任务字段为null
+        stmt = stmt.outerjoin(Task, (StudyRecord.task_id == Task.id) & (Task.user_id == StudyRecord.user_id))
+    return stmt
+
+
+async def _fetch_records(db: AsyncSession, stmt, columns: Optional[Sequence[Any]] = None) -> list:
+    """执行查询，未指定列时返回学习记录对象，否则返回Row"""
+    result = await db.execute(stmt)
+    return result.scalars().all() if columns is None else result.all()
+
+
+async def _apply_rollups(db: AsyncSession, record: StudyRecord, sign: int) -> None:
+    """将学习记录计入（sign=1）或移出（sign=-1）统计汇总表"""
+    await apply_daily_delta(
+        db,
+        user_id=record.user_id,
+        day=record.record_date,
+        minutes=sign * record.duration,
+        record_count=sign
+    )
+    await apply_task_delta(
+        db,
+        user_id=record.user_id,
+        task_id=record.task_id,
+        day=record.record_date,
+        minutes=sign * record.duration
+    )
 
 
 async def get_record(db: AsyncSession, record_id: int, user_id: int) -> Optional[StudyRecord]:
@@ -18,65 +85,186 @@ async def get_record(db: AsyncSession, record_id: int, user_id: int) -> Optional
     return result.scalars().first()
 
 
-async def get_records(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[StudyRecord]:
-    """获取用户的所有学习记录"""
+async def get_records(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[date, int]] = None,
+    columns: Optional[Sequence[Any]] = None
+) -> List[StudyRecord]:
+    """获取用户的所有学习记录（按日期、ID排序；传入after时使用游标分页，传入columns时只查询这些列并返回Row）"""
+    stmt = _select_records(columns).where(StudyRecord.user_id == user_id)
+    if after is not None:
+        # 游标分页：从上一页最后一条之后继续，每页开销与翻页深度无关
+        stmt = stmt.where(tuple_(StudyRecord.record_date, StudyRecord.id) > tuple_(*after))
+    else:
+        stmt = stmt.offset(skip)
+    
+    return await _fetch_records(db, stmt.order_by(StudyRecord.record_date, StudyRecord.id).limit(limit), columns)
+
+
+async def get_records_with_task(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100
+) -> List[StudyRecord]:
+    """获取学习记录并一次性加载其所属任务的标题（record.task.title 可直接访问，任务不属于该用户时为None）"""
     result = await db.execute(
-        select(StudyRecord).where(StudyRecord.user_id == user_id)
-        .offset(skip).limit(limit)
+        select(StudyRecord).where(StudyRecord.user_id == user_id).options(
+            selectinload(StudyRecord.task.and_(Task.user_id == user_id)).load_only(Task.id, Task.title)
+        ).order_by(StudyRecord.record_date, StudyRecord.id).offset(skip).limit(limit)
     )
     return result.scalars().all()
 
 
-async def get_records_by_date_range(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> List[StudyRecord]:
-    """获取指定日期范围内的学习记录"""
-    result = await db.execute(
-        select(StudyRecord).where(
-            StudyRecord.user_id == user_id,
-            StudyRecord.record_date >= start_date,
-            StudyRecord.record_date <= end_date
-        )
+def _date_range_stmt(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    after: Optional[Tuple[date, int]] = None,
+    columns: Optional[Sequence[Any]] = None
+):
+    """指定日期范围内学习记录的查询（按日期、ID排序）"""
+    stmt = _select_records(columns).where(
+        StudyRecord.user_id == user_id,
+        StudyRecord.record_date >= start_date,
+        StudyRecord.record_date <= end_date
     )
-    return result.scalars().all()
+    if after is not None:
+        stmt = stmt.where(tuple_(StudyRecord.record_date, StudyRecord.id) > tuple_(*after))
+    return stmt.order_by(StudyRecord.record_date, StudyRecord.id)
+
+
+async def get_records_by_date_range(
+    db: AsyncSession,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    limit: Optional[int] = None,
+    after: Optional[Tuple[date, int]] = None,
+    columns: Optional[Sequence[Any]] = None
+) -> List[StudyRecord]:
+    """获取指定日期范围内的学习记录（可限制条数并使用游标分页，传入columns时只查询这些列并返回Row）"""
+    stmt = _date_range_stmt(user_id, start_date, end_date, after, columns)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    
+    return await _fetch_records(db, stmt, columns)
+
+
+async def stream_records_by_date_range(
+    db: AsyncSession,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    chunk_size: int = 500,
+    columns: Optional[Sequence[Any]] = None
+) -> AsyncIterator[StudyRecord]:
+    """逐批流式读取指定日期范围内的学习记录，内存占用与范围大小无关（传入columns时只查询这些列并返回Row）"""
+    stmt = _date_range_stmt(user_id, start_date, end_date, columns=columns).execution_options(yield_per=chunk_size)
+    if columns is None:
+        result = await db.stream_scalars(stmt)
+    else:
+        result = await db.stream(stmt)
+    async for record in result:
+        yield record
 
 
 async def create_record(db: AsyncSession, record_in: StudyRecordCreate, user_id: int) -> StudyRecord:
-    """创建学习记录"""
-    db_record = StudyRecord(
-        **record_in.model_dump(),
-        user_id=user_id,
-    )
-    db.add(db_record)
-    await db.commit()
-    await db.refresh(db_record)
-    return db_record
+    """创建学习记录（INSERT ... RETURNING，一条语句写入并取回）"""
+    async def write(session: AsyncSession) -> StudyRecord:
+        result = await session.execute(
+            insert(StudyRecord).values(
+                **record_in.model_dump(),
+                user_id=user_id,
+            ).returning(StudyRecord)
+        )
+        db_record = result.scalars().one()
+        await _apply_rollups(session, db_record, 1)
+        return db_record
+    
+    return await run_write(db, write)
+
+
+async def create_records_bulk(db: AsyncSession, records_in: List[StudyRecordCreate], user_id: int) -> List[int]:
+    """在单个事务中批量创建学习记录，返回与输入顺序一致的记录ID"""
+    if not records_in:
+        return []
+    
+    rows = [{**record_in.model_dump(), "user_id": user_id} for record_in in records_in]
+    
+    # 汇总表增量先按日期、任务合并，再批量写入
+    daily = defaultdict(lambda: [0, 0])
+    task_daily = defaultdict(int)
+    for row in rows:
+        daily[row["record_date"]][0] += row["duration"]
+        daily[row["record_date"]][1] += 1
+        task_daily[(row["task_id"], row["record_date"])] += row["duration"]
+    
+    async def write(session: AsyncSession) -> List[int]:
+        result = await session.execute(
+            insert(StudyRecord).returning(StudyRecord.id, sort_by_parameter_order=True),
+            rows
+        )
+        record_ids = result.scalars().all()
+        await apply_daily_deltas(session, [
+            {"user_id": user_id, "day": day, "minutes": minutes, "record_count": count}
+            for day, (minutes, count) in daily.items()
+        ])
+        await apply_task_deltas(session, [
+            {"user_id": user_id, "task_id": task_id, "day": day, "minutes": minutes}
+            for (task_id, day), minutes in task_daily.items()
+        ])
+        return record_ids
+    
+    return await run_write(db, write)
 
 
 async def update_record(db: AsyncSession, record_id: int, record_in: StudyRecordUpdate, user_id: int) -> Optional[StudyRecord]:
     """更新学习记录（检查用户权限）"""
-    db_record = await get_record(db, record_id, user_id)
-    if not db_record:
-        return None
-    
-    # 更新学习记录属性
     update_data = record_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_record, field, value)
+    if not update_data:
+        return await get_record(db, record_id, user_id)
     
-    db.add(db_record)
-    await db.commit()
-    await db.refresh(db_record)
-    return db_record
+    async def write(session: AsyncSession) -> Optional[StudyRecord]:
+        # 先由数据库按旧值从汇总表移出（记录不存在或不属于该用户时不做修改），更新后再计入新值
+        await retract_record(session, record_id, user_id)
+        
+        # 归属检查与更新在同一条 UPDATE ... RETURNING 中完成
+        result = await session.execute(
+            update(StudyRecord).where(
+                StudyRecord.id == record_id,
+                StudyRecord.user_id == user_id
+            ).values(**update_data).returning(StudyRecord)
+        )
+        db_record = result.scalars().first()
+        if db_record:
+            await _apply_rollups(session, db_record, 1)
+        return db_record
+    
+    return await run_write(db, write)
 
 
 async def delete_record(db: AsyncSession, record_id: int, user_id: int) -> bool:
     """删除学习记录（检查用户权限）"""
-    db_record = await get_record(db, record_id, user_id)
-    if not db_record:
-        return False
+    async def write(session: AsyncSession) -> bool:
+        # DELETE ... RETURNING 取回被删除记录的旧值，用于更新汇总表
+        result = await session.execute(
+            delete(StudyRecord).where(
+                StudyRecord.id == record_id,
+                StudyRecord.user_id == user_id
+            ).returning(StudyRecord.user_id, StudyRecord.task_id, StudyRecord.record_date, StudyRecord.duration)
+        )
+        db_record = result.first()
+        if not db_record:
+            return False
+        
+        await _apply_rollups(session, db_record, -1)
+        return True
     
-    await db.delete(db_record)
-    await db.commit()
-    return True
+    return await run_write(db, write)
 
 
 async def get_daily_total(db: AsyncSession, user_id: int, target_date: date) -> int:
@@ -0,0 +1,55 @@
+from typing import Optional, List
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, update
+
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+
+async def create_refresh_token(db: AsyncSession, user_id: int, token_hash: str, expires_at: datetime) -> None:
+    """保存刷新令牌（不提交事务）"""
+    await db.execute(
+        insert(RefreshToken).values(
+            user_id=user_id,
+            token_hash=token_hash,
+            expires_at=expires_at,
+        )
+    )
+
+
+async def get_refresh_token(db: AsyncSession, token_hash: str):
+    """按令牌哈希查询刷新令牌及其用户名（一次索引查找）"""
+    result = await db.execute(
+        select(
+            RefreshToken.id,
+            RefreshToken.user_id,
+            RefreshToken.expires_at,
+            RefreshToken.revoked_at,
+            User.username
+        ).join(User, RefreshToken.user_id == User.id).where(RefreshToken.token_hash == token_hash)
+    )
+    return result.first()
+
+
+async def revoke_refresh_token(db: AsyncSession, token_id: int) -> Optional[str]:
+    """吊销刷新令牌（不提交事务），返回被吊销令牌的哈希；已被吊销时返回None"""
+    result = await db.execute(
+        update(RefreshToken).where(
+            RefreshToken.id == token_id,
+            RefreshToken.revoked_at.is_(None)
+        ).values(revoked_at=datetime.utcnow()).returning(RefreshToken.token_hash)
+    )
+    return result.scalar()
+
+
+async def revoke_user_refresh_tokens(db: AsyncSession, user_id: int) -> List[str]:
+    """吊销用户的全部有效刷新令牌（不提交事务），返回被吊销令牌的哈希"""
+    result = await db.execute(
+        update(RefreshToken).where(
+            RefreshToken.user_id == user_id,
+            RefreshToken.revoked_at.is_(None)
+        ).values(revoked_at=datetime.utcnow()).returning(RefreshToken.token_hash)
+    )
+    return result.scalars().all()
+
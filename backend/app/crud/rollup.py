@@ -0,0 +1,157 @@
+from typing import Optional, List
+from datetime import date
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, literal
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.models.record import StudyRecord
+from app.models.task import Task
+from app.models.rollup import UserDailyTotal, TaskDailyTotal
+
+
+def _upsert(db: AsyncSession, table):
+    """按数据库方言构造支持 ON CONFLICT 的 INSERT 语句"""
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def _accumulate_daily(stmt):
+    """冲突时将增量累加到已有的用户每日汇总行"""
+    return stmt.on_conflict_do_update(
+        index_elements=[UserDailyTotal.user_id, UserDailyTotal.day],
+        set_={
+            "minutes": UserDailyTotal.minutes + stmt.excluded.minutes,
+            "record_count": UserDailyTotal.record_count + stmt.excluded.record_count,
+        }
+    )
+
+
+def _accumulate_task(stmt):
+    """冲突时将增量累加到已有的用户每日各任务汇总行"""
+    return stmt.on_conflict_do_update(
+        index_elements=[TaskDailyTotal.user_id, TaskDailyTotal.task_id, TaskDailyTotal.day],
+        set_={"minutes": TaskDailyTotal.minutes + stmt.excluded.minutes}
+    )
+
+
+async def apply_daily_deltas(db: AsyncSession, deltas: List[dict]) -> None:
+    """批量累加用户每日汇总增量（每项含user_id、day、minutes、record_count，不提交事务）"""
+    if not deltas:
+        return
+    await db.execute(_accumulate_daily(_upsert(db, UserDailyTotal.__table__)), deltas)
+
+
+async def apply_task_deltas(db: AsyncSession, deltas: List[dict]) -> None:
+    """批量累加用户每日各任务汇总增量（每项含user_id、task_id、day、minutes，不提交事务）"""
+    if not deltas:
+        return
+    await db.execute(_accumulate_task(_upsert(db, TaskDailyTotal.__table__)), deltas)
+
+
+async def retract_record(db: AsyncSession, record_id: int, user_id: int) -> None:
+    """将学习记录从汇总表中移出（增量直接由记录行生成，记录不存在时不做任何修改，不提交事务）"""
+    condition = (StudyRecord.id == record_id) & (StudyRecord.user_id == user_id)
+    await db.execute(_accumulate_daily(
+        _upsert(db, UserDailyTotal.__table__).from_select(
+            ["user_id", "day", "minutes", "record_count"],
+            select(StudyRecord.user_id, StudyRecord.record_date, -StudyRecord.duration, literal(-1)).where(condition)
+        )
+    ))
+    await db.execute(_accumulate_task(
+        _upsert(db, TaskDailyTotal.__table__).from_select(
+            ["user_id", "task_id", "day", "minutes"],
+            select(StudyRecord.user_id, StudyRecord.task_id, StudyRecord.record_date, -StudyRecord.duration).where(condition)
+        )
+    ))
+
+
+async def retract_task_records(db: AsyncSession, task_id: int, user_id: int) -> None:
+    """将用户自己任务的全部学习记录从每日汇总中移出（每天合并为一条增量，不提交事务）"""
+    await db.execute(_accumulate_daily(
+        _upsert(db, UserDailyTotal.__table__).from_select(
+            ["user_id", "day", "minutes", "record_count"],
+            select(
+                StudyRecord.user_id,
+                StudyRecord.record_date,
+                -func.sum(StudyRecord.duration),
+                -func.count(StudyRecord.id)
+            ).where(
+                StudyRecord.task_id.in_(select(Task.id).where(Task.id == task_id, Task.user_id == user_id))
+            ).group_by(StudyRecord.user_id, StudyRecord.record_date)
+        )
+    ))
+
+
+async def delete_task_totals(db: AsyncSession, task_id: int, user_id: int) -> None:
+    """删除用户自己任务的每日汇总行（不提交事务）；记录全部删除或移到其他任务后，汇总行分钟数为0但仍引用该任务"""
+    await db.execute(
+        delete(TaskDailyTotal).where(
+            TaskDailyTotal.user_id == user_id,
+            TaskDailyTotal.task_id.in_(select(Task.id).where(Task.id == task_id, Task.user_id == user_id))
+        )
+    )
+
+
+async def apply_daily_delta(db: AsyncSession, user_id: int, day: date, minutes: int, record_count: int) -> None:
+    """将学习时长增量累加到用户每日汇总（不提交事务）"""
+    await apply_daily_deltas(db, [{
+        "user_id": user_id,
+        "day": day,
+        "minutes": minutes,
+        "record_count": record_count,
+    }])
+
+
+async def apply_task_delta(db: AsyncSession, user_id: int, task_id: int, day: date, minutes: int) -> None:
+    """将学习时长增量累加到用户每日各任务汇总（不提交事务）"""
+    await apply_task_deltas(db, [{
+        "user_id": user_id,
+        "task_id": task_id,
+        "day": day,
+        "minutes": minutes,
+    }])
+
+
+async def rebuild_daily_totals(db: AsyncSession, user_id: Optional[int] = None) -> None:
+    """根据学习记录重建每日汇总（不提交事务），user_id 为空时重建全部用户"""
+    clear_stmt = delete(UserDailyTotal)
+    source = select(
+        StudyRecord.user_id,
+        StudyRecord.record_date,
+        func.sum(StudyRecord.duration),
+        func.count(StudyRecord.id)
+    ).group_by(StudyRecord.user_id, StudyRecord.record_date)
+    
+    if user_id is not None:
+        clear_stmt = clear_stmt.where(UserDailyTotal.user_id == user_id)
+        source = source.where(StudyRecord.user_id == user_id)
+    
+    await db.execute(clear_stmt)
+    await db.execute(
+        insert(UserDailyTotal).from_select(
+            ["user_id", "day", "minutes", "record_count"], source
+        )
+    )
+
+
+async def rebuild_task_totals(db: AsyncSession, user_id: Optional[int] = None) -> None:
+    """根据学习记录重建每日各任务汇总（不提交事务），user_id 为空时重建全部用户"""
+    clear_stmt = delete(TaskDailyTotal)
+    source = select(
+        StudyRecord.user_id,
+        StudyRecord.task_id,
+        StudyRecord.record_date,
+        func.sum(StudyRecord.duration)
+    ).group_by(StudyRecord.user_id, StudyRecord.task_id, StudyRecord.record_date)
+    
+    if user_id is not None:
+        clear_stmt = clear_stmt.where(TaskDailyTotal.user_id == user_id)
+        source = source.where(StudyRecord.user_id == user_id)
+    
+    await db.execute(clear_stmt)
+    await db.execute(
+        insert(TaskDailyTotal).from_select(
+            ["user_id", "task_id", "day", "minutes"], source
+        )
+    )
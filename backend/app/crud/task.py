@@ -1,67 +1,158 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple, Sequence, Any
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, delete, tuple_, literal, func
+from sqlalchemy.orm import undefer
 
+from app.db.writer import run_write
+from app.crud.rollup import delete_task_totals, retract_task_records
 from app.models.task import Task
+from app.models.record import StudyRecord
 from app.schemas.task import TaskCreate, TaskUpdate
 
 
+# 列表接口查询的列
+TASK_LIST_COLUMNS = (
+    Task.title, Task.description, Task.priority, Task.status, Task.id, Task.user_id, Task.created_at
+)
+# 列表接口可选择的字段
+TASK_LIST_FIELDS = tuple(column.key for column in TASK_LIST_COLUMNS)
+
+
+def task_list_columns(fields: Optional[Sequence[str]] = None) -> Tuple[Any, ...]:
+    """列表查询的列：未指定字段时为全部列表字段，否则为所选字段加上游标分页使用的列"""
+    if fields is None:
+        return TASK_LIST_COLUMNS
+    return tuple(
+        column for column in TASK_LIST_COLUMNS
+        if column.key in fields or column.key in ("created_at", "id")
+    )
+
+
 async def get_task(db: AsyncSession, task_id: int, user_id: int) -> Optional[Task]:
     """获取单个任务（检查用户权限）"""
     result = await db.execute(
         select(Task).where(
             Task.id == task_id, 
             Task.user_id == user_id
-        )
+        ).options(undefer(Task.description))
     )
     return result.scalars().first()
 
 
-async def get_tasks(db: AsyncSession, user_id: int, skip: int = 0, limit: int = 100) -> List[Task]:
-    """获取用户的所有任务"""
+def _created_at_order(db: AsyncSession):
+    """任务列表排序与游标比较使用的创建时间表达式"""
+    # SQLite以文本存储时间：CURRENT_TIMESTAMP写入的值不带微秒，经SQLAlchemy写入的值带微秒，
+    # 两者按文本比较的顺序与时间顺序不一致，因此两边都规范化到秒（同一秒内按ID排序）
+    if db.get_bind().dialect.name == "sqlite":
+        return func.datetime(Task.created_at)
+    return Task.created_at
+
+
+def _created_at_key(db: AsyncSession, created_at: datetime):
+    """构造与_created_at_order比较的游标值（按列的类型绑定参数）"""
+    value = literal(created_at, Task.created_at.type)
+    if db.get_bind().dialect.name == "sqlite":
+        return func.datetime(value)
+    return value
+
+
+async def get_tasks(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    after: Optional[Tuple[datetime, int]] = None,
+    columns: Optional[Sequence[Any]] = None
+) -> List[Task]:
+    """获取用户的所有任务（按创建时间、ID排序；传入after时使用游标分页，传入columns时只查询这些列并返回Row）"""
+    stmt = (select(Task) if columns is None else select(*columns)).where(Task.user_id == user_id)
+    order = _created_at_order(db)
+    if after is not None:
+        # 游标分页：从上一页最后一条之后继续，每页开销与翻页深度无关
+        # （单独的 >= 条件使SQLite可以按索引定位到游标处，而不是从头逐行比较）
+        created_at, task_id = after
+        key = _created_at_key(db, created_at)
+        stmt = stmt.where(order >= key, tuple_(order, Task.id) > tuple_(key, task_id))
+    else:
+        stmt = stmt.offset(skip)
+    
     result = await db.execute(
-        select(Task).where(
-            Task.user_id == user_id
-        ).offset(skip).limit(limit)
+        stmt.order_by(order, Task.id).limit(limit)
     )
-    return result.scalars().all()
+    return result.scalars().all() if columns is None else result.all()
 
 
-async def create_task(db: AsyncSession, task_in: TaskCreate, user_id: int) -> Task:
-    """创建任务"""
-    db_task = Task(
-        **task_in.model_dump(),
-        user_id=user_id,
+async def get_tasks_with_record_count(
+    db: AsyncSession,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100
+) -> List[Tuple[Task, int]]:
+    """获取用户的任务及每个任务的学习记录数（一条查询，返回 (任务, 记录数) 元组）"""
+    record_count = select(func.count(StudyRecord.id)).where(
+        StudyRecord.user_id == user_id,
+        StudyRecord.task_id == Task.id
+    ).correlate(Task).scalar_subquery()
+    
+    result = await db.execute(
+        select(Task, record_count.label("record_count")).where(Task.user_id == user_id)
+        .order_by(Task.created_at, Task.id).offset(skip).limit(limit)
     )
-    db.add(db_task)
-    await db.commit()
-    await db.refresh(db_task)
-    return db_task
+    return [tuple(row) for row in result.all()]
+
+
+async def create_task(db: AsyncSession, task_in: TaskCreate, user_id: int) -> Task:
+    """创建任务（INSERT ... RETURNING，一条语句写入并取回）"""
+    async def write(session: AsyncSession) -> Task:
+        # 未提供的可选字段交给列默认值处理
+        result = await session.execute(
+            insert(Task).values(
+                **task_in.model_dump(exclude_none=True),
+                user_id=user_id,
+            ).returning(Task).options(undefer(Task.description))
+        )
+        return result.scalars().one()
+    
+    return await run_write(db, write)
 
 
 async def update_task(db: AsyncSession, task_id: int, task_in: TaskUpdate, user_id: int) -> Optional[Task]:
     """更新任务（检查用户权限）"""
-    db_task = await get_task(db, task_id, user_id)
-    if not db_task:
-        return None
-    
-    # 更新任务属性
     update_data = task_in.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_task, field, value)
+    if not update_data:
+        return await get_task(db, task_id, user_id)
+    
+    async def write(session: AsyncSession) -> Optional[Task]:
+        # 归属检查与更新在同一条 UPDATE ... RETURNING 中完成
+        result = await session.execute(
+            update(Task).where(
+                Task.id == task_id,
+                Task.user_id == user_id
+            ).values(**update_data).returning(Task).options(undefer(Task.description))
+        )
+        return result.scalars().first()
     
-    db.add(db_task)
-    await db.commit()
-    await db.refresh(db_task)
-    return db_task
+    return await run_write(db, write)
 
 
 async def delete_task(db: AsyncSession, task_id: int, user_id: int) -> bool:
-    """删除任务（检查用户权限）"""
-    db_task = await get_task(db, task_id, user_id)
-    if not db_task:
-        return False
+    """删除任务及其学习记录（检查用户权限）"""
+    async def write(session: AsyncSession) -> bool:
+        # 先删除引用该任务的学习记录与汇总行，否则外键约束会阻止删除任务；任一步失败时一并回滚
+        await retract_task_records(session, task_id, user_id)
+        await session.execute(
+            delete(StudyRecord).where(
+                StudyRecord.task_id.in_(select(Task.id).where(Task.id == task_id, Task.user_id == user_id))
+            )
+        )
+        await delete_task_totals(session, task_id, user_id)
+        result = await session.execute(
+            delete(Task).where(
+                Task.id == task_id,
+                Task.user_id == user_id
+            ).returning(Task.id)
+        )
+        return result.first() is not None
     
-    await db.delete(db_task)
-    await db.commit()
-    return True
+    return await run_write(db, write)
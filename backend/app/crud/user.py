@@ -1,10 +1,11 @@
 from typing import Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, insert, update, func
 
+from app.db.writer import run_write
 from app.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 
 
 async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
@@ -14,8 +15,8 @@ async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
-    """通过邮箱获取用户"""
-    result = await db.execute(select(User).where(User.email == email))
+    """通过邮箱获取用户（不区分大小写）"""
+    result = await db.execute(select(User).where(func.lower(User.email) == email.lower()))
     return result.scalars().first()
 
 
@@ -26,13 +27,28 @@ async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
 
 
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
-    """创建用户"""
-    db_user = User(
-        username=user_in.username,
-        email=user_in.email,
-        password_hash=get_password_hash(user_in.password),
+    """创建用户（INSERT ... RETURNING，一条语句写入并取回；用户名或邮箱重复时抛出IntegrityError）"""
+    # 先在进程池中完成哈希，写操作单元内只执行插入
+    password_hash = await get_password_hash_async(user_in.password)
+    
+    async def write(session: AsyncSession) -> User:
+        result = await session.execute(
+            insert(User).values(
+                username=user_in.username,
+                email=user_in.email,
+                password_hash=password_hash,
+            ).returning(User)
+        )
+        return result.scalars().one()
+    
+    return await run_write(db, write)
+
+
+async def update_user_password_hash(db: AsyncSession, user_id: int, password_hash: str) -> None:
+    """更新用户密码哈希"""
+    await run_write(
+        db,
+        lambda session: session.execute(
+            update(User).where(User.id == user_id).values(password_hash=password_hash)
+        )
     )
-    db.add(db_user)
-    await db.commit()
-    await db.refresh(db_user)
-    return db_user
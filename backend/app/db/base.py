@@ -7,3 +7,5 @@ Base = declarative_base()
 from app.models.user import User
 from app.models.task import Task
 from app.models.record import StudyRecord
+from app.models.rollup import UserDailyTotal, TaskDailyTotal
+from app.models.refresh_token import RefreshToken
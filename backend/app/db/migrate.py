@@ -0,0 +1,152 @@
+from typing import Awaitable, Callable, List, NamedTuple, Optional
+from sqlalchemy import Table, MetaData, Column, Integer, String, DateTime, select, insert, func, text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from app.db.base import Base
+from app.crud.rollup import rebuild_daily_totals, rebuild_task_totals
+
+# 已执行的迁移版本记录表，独立于模型元数据，不随 create_all 创建
+schema_metadata = MetaData()
+schema_version = Table(
+    "schema_version",
+    schema_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    """一个结构迁移；每个迁移都可以安全地重复执行"""
+    version: int
+    description: str
+    upgrade: Callable[[AsyncConnection], Awaitable[None]]
+    # False 表示在事务外执行（PostgreSQL 的 CREATE INDEX CONCURRENTLY 不能在事务中运行）
+    transactional: bool = True
+
+
+async def _create_tables(conn: AsyncConnection, *names: str) -> None:
+    """按模型定义创建尚不存在的表"""
+    tables = [Base.metadata.tables[name] for name in names]
+    await conn.run_sync(Base.metadata.create_all, tables=tables, checkfirst=True)
+
+
+async def _create_index(conn: AsyncConnection, name: str, table: str, columns: str, unique: bool = False) -> None:
+    """创建索引（已存在时跳过）；PostgreSQL 上在线创建，建索引期间不阻塞写入"""
+    concurrently = ""
+    if conn.dialect.name == "postgresql":
+        concurrently = "CONCURRENTLY "
+        # 中断的 CONCURRENTLY 建索引会留下无效索引，需先删除再重建
+        invalid = await conn.execute(
+            text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ),
+            {"name": name}
+        )
+        if invalid.first():
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    
+    unique_sql = "UNIQUE " if unique else ""
+    await conn.execute(text(f"CREATE {unique_sql}INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns})"))
+
+
+async def _baseline(conn: AsyncConnection) -> None:
+    """初始结构：用户、任务、学习记录表"""
+    await _create_tables(conn, "users", "tasks", "study_records")
+
+
+async def _add_query_indexes(conn: AsyncConnection) -> None:
+    """学习记录与任务列表、统计查询使用的复合索引"""
+    await _create_index(conn, "ix_study_records_user_date", "study_records", "user_id, record_date")
+    await _create_index(conn, "ix_study_records_user_task_date", "study_records", "user_id, task_id, record_date")
+    await _create_index(conn, "ix_tasks_user_status_priority", "tasks", "user_id, status, priority")
+    await _create_index(conn, "ix_tasks_user_created", "tasks", "user_id, created_at")
+
+
+async def _add_rollup_tables(conn: AsyncConnection) -> None:
+    """统计汇总表，并根据已有学习记录回填"""
+    await _create_tables(conn, "user_daily_totals", "task_daily_totals")
+    async with AsyncSession(bind=conn) as db:
+        await rebuild_daily_totals(db)
+        await rebuild_task_totals(db)
+
+
+async def _add_refresh_tokens(conn: AsyncConnection) -> None:
+    """刷新令牌表"""
+    await _create_tables(conn, "refresh_tokens")
+
+
+async def _add_email_lower_index(conn: AsyncConnection) -> None:
+    """邮箱不区分大小写的唯一索引（已有仅大小写不同的重复邮箱时会失败，需先清理）"""
+    await _create_index(conn, "ix_users_email_lower", "users", "lower(email)", unique=True)
+
+
+async def _add_task_foreign_key_indexes(conn: AsyncConnection) -> None:
+    """引用任务的外键列索引，删除任务时的外键检查无需扫描学习记录与汇总表"""
+    await _create_index(conn, "ix_study_records_task", "study_records", "task_id")
+    await _create_index(conn, "ix_task_daily_totals_task", "task_daily_totals", "task_id")
+
+
+async def _add_task_created_seconds_index(conn: AsyncConnection) -> None:
+    """SQLite 上任务游标分页按规范化到秒的创建时间排序所用的索引（其他数据库直接使用 created_at 列的索引）"""
+    if conn.dialect.name == "sqlite":
+        await _create_index(conn, "ix_tasks_user_created_seconds", "tasks", "user_id, datetime(created_at)")
+
+
+# 按版本号递增排列，新迁移只能追加到末尾
+MIGRATIONS: List[Migration] = [
+    Migration(1, "baseline users, tasks and study_records", _baseline),
+    Migration(2, "composite indexes for record and task queries", _add_query_indexes, transactional=False),
+    Migration(3, "statistics rollup tables", _add_rollup_tables),
+    Migration(4, "refresh tokens", _add_refresh_tokens),
+    Migration(5, "case-insensitive unique email index", _add_email_lower_index, transactional=False),
+    Migration(6, "task foreign key indexes", _add_task_foreign_key_indexes, transactional=False),
+    Migration(7, "sqlite task created_at index", _add_task_created_seconds_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+async def get_schema_version(engine: AsyncEngine) -> int:
+    """读取数据库当前的结构版本（一条查询），尚未建立版本表时返回0"""
+    async with engine.connect() as conn:
+        try:
+            result = await conn.execute(select(func.max(schema_version.c.version)))
+        except (OperationalError, ProgrammingError):
+            return 0
+        return result.scalar() or 0
+
+
+async def _record_version(conn: AsyncConnection, migration: Migration) -> None:
+    """记录迁移已执行"""
+    await conn.execute(
+        insert(schema_version).values(version=migration.version, description=migration.description)
+    )
+
+
+async def upgrade(engine: AsyncEngine, target: Optional[int] = None) -> List[Migration]:
+    """按顺序执行尚未应用的迁移（直到target版本），返回本次执行的迁移"""
+    async with engine.begin() as conn:
+        await conn.run_sync(schema_metadata.create_all, checkfirst=True)
+    
+    current = await get_schema_version(engine)
+    applied = []
+    for migration in MIGRATIONS:
+        if migration.version <= current or (target is not None and migration.version > target):
+            continue
+    
+        if migration.transactional or engine.dialect.name != "postgresql":
+            async with engine.begin() as conn:
+                await migration.upgrade(conn)
+                await _record_version(conn, migration)
+        else:
+            # 在事务外执行；迁移可重复执行，记录版本前中断时重跑即可
+            async with engine.execution_options(isolation_level="AUTOCOMMIT").connect() as conn:
+                await migration.upgrade(conn)
+            async with engine.begin() as conn:
+                await _record_version(conn, migration)
+        applied.append(migration)
+    
+    return applied
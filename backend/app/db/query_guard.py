@@ -0,0 +1,66 @@
+import contextvars
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.db.session import engine, read_engine
+
+
+class QueryLimitExceeded(RuntimeError):
+    """单个请求执行的SQL语句数超过上限"""
+
+
+class QueryBudget:
+    """一个请求内已执行的SQL语句数与上限"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.count = 0
+        self.last_context = None
+
+
+# 当前请求的查询计数；请求内创建的任务与 AsyncSession 执行语句的 greenlet 都继承同一上下文
+_current_budget: contextvars.ContextVar[Optional[QueryBudget]] = contextvars.ContextVar("query_budget", default=None)
+
+
+def start_query_budget(limit: int) -> QueryBudget:
+    """为当前上下文开始统计SQL语句数"""
+    budget = QueryBudget(limit)
+    _current_budget.set(budget)
+    return budget
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    """每条SQL语句执行前计数，超过上限时让请求失败并指出超限的语句"""
+    budget = _current_budget.get()
+    # 同一语句分批执行（如批量插入）只计一次
+    if budget is None or context is budget.last_context:
+        return
+    budget.last_context = context
+    budget.count += 1
+    if budget.count > budget.limit:
+        raise QueryLimitExceeded(
+            f"Request issued more than {budget.limit} SQL statements, last statement: {statement}"
+        )
+
+
+def install_query_guard(*engines: AsyncEngine) -> None:
+    """在给定引擎（默认为应用的读写引擎）上注册SQL语句计数"""
+    for target in set(engines or (engine, read_engine)):
+        if not event.contains(target.sync_engine, "before_cursor_execute", _count_query):
+            event.listen(target.sync_engine, "before_cursor_execute", _count_query)
+
+
+class QueryCountGuard(BaseHTTPMiddleware):
+    """为每个请求开始统计SQL语句数，并在响应头 X-Query-Count 返回本次执行的语句数"""
+
+    def __init__(self, app, limit: int):
+        super().__init__(app)
+        self.limit = limit
+
+    async def dispatch(self, request, call_next):
+        budget = start_query_budget(self.limit)
+        response = await call_next(request)
+        response.headers["X-Query-Count"] = str(budget.count)
+        return response
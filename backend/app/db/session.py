@@ -1,22 +1,136 @@
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from app.core.config import settings
 
+
+def engine_options(database_url: str, read_only: bool = False) -> Dict[str, Any]:
+    """按数据库方言生成引擎参数（read_only 时使用只读连接池的大小）"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}  # SQLite特定配置
+    
+    options: Dict[str, Any] = {
+        "pool_size": settings.DB_READ_POOL_SIZE if read_only else settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_READ_MAX_OVERFLOW if read_only else settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == "asyncpg":
+        connect_args: Dict[str, Any] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+        if read_only:
+            # 只读连接池连接主库时，由数据库拒绝误发的写操作
+            connect_args["server_settings"] = {"default_transaction_read_only": "on"}
+        options["connect_args"] = connect_args
+    return options
+
+
 # 创建异步数据库引擎
 engine = create_async_engine(
     settings.DATABASE_URL,
     echo=False,  # 生产环境可以设置为False
-    connect_args={"check_same_thread": False}  # SQLite特定配置
+    **engine_options(settings.DATABASE_URL)
 )
 
+
+def sqlite_pragmas(read_only: bool = False) -> Dict[str, object]:
+    """按配置返回每个SQLite连接建立时要设置的PRAGMA"""
+    if settings.SQLITE_PRAGMA_PROFILE == "off":
+        return {}
+    pragmas: Dict[str, object] = {
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "temp_store": "MEMORY",
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT_MS,
+    }
+    if not read_only:
+        # WAL 模式下读写互不阻塞（日志模式保存在数据库文件中，只读连接沿用写连接的设置）
+        pragmas["journal_mode"] = "WAL"
+        # WAL 下 NORMAL 仍可保证数据库一致性，仅在断电时可能丢失最近的提交
+        pragmas["synchronous"] = "NORMAL"
+    return pragmas
+
+
+def _register_sqlite_pragmas(target_engine, read_only: bool = False) -> None:
+    """在SQLite引擎新建连接时设置PRAGMA"""
+    @event.listens_for(target_engine.sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in sqlite_pragmas(read_only).items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _register_sqlite_explicit_begin(target_engine) -> None:
+    """由SQLAlchemy显式发出BEGIN，使SAVEPOINT处于外层事务之内（pysqlite 默认不会在SAVEPOINT前开启事务）"""
+    @event.listens_for(target_engine.sync_engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+    
+    @event.listens_for(target_engine.sync_engine, "begin")
+    def _emit_begin(conn):
+        conn.exec_driver_sql("BEGIN")
+
+
+if engine.dialect.name == "sqlite":
+    _register_sqlite_pragmas(engine)
+    if settings.DB_WRITE_QUEUE:
+        # 写入队列为每个写操作使用SAVEPOINT，多个写操作合并为一次提交
+        _register_sqlite_explicit_begin(engine)
+
+
+def _read_database_url() -> Optional[str]:
+    """只读连接使用的数据库URL，无可用的只读连接方式（内存SQLite数据库）时返回None"""
+    if settings.DATABASE_READ_URL:
+        return settings.DATABASE_READ_URL
+    
+    url = make_url(settings.DATABASE_URL)
+    if url.get_backend_name() != "sqlite":
+        # 未配置只读副本时连接主库，但仍使用独立的连接池
+        return settings.DATABASE_URL
+    if url.database and url.database != ":memory:":
+        # 以只读模式打开同一数据库文件，WAL 下读取不阻塞写入
+        return url.set(
+            database=f"file:{url.database}",
+            query={**url.query, "mode": "ro", "uri": "true"}
+        ).render_as_string(hide_password=False)
+    return None
+
+
+# 只读引擎：统计与列表查询使用独立的连接池，不与写操作争用连接
+_read_url = _read_database_url()
+if _read_url is not None:
+    read_engine = create_async_engine(
+        _read_url,
+        echo=False,
+        **engine_options(_read_url, read_only=True)
+    )
+    if read_engine.dialect.name == "sqlite":
+        _register_sqlite_pragmas(read_engine, read_only=True)
+else:
+    read_engine = engine
+
+
 # 创建异步会话工厂
 SessionLocal = async_sessionmaker(
     autocommit=False,
     autoflush=False,
+    expire_on_commit=False,  # 提交后保留已加载的属性，写操作无需再refresh
     bind=engine
 )
 
 
+# 只读会话工厂
+ReadSessionLocal = async_sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=read_engine
+)
+
+
 async def get_db():
     """获取异步数据库会话"""
     async with SessionLocal() as session:
@@ -24,3 +138,12 @@ async def get_db():
             yield session
         finally:
             await session.close()
+
+
+async def get_read_db():
+    """获取只读异步数据库会话（统计与列表查询）"""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
@@ -0,0 +1,214 @@
+import asyncio
+import contextvars
+import random
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple, TypeVar
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.metrics import register_collector
+from app.db.session import SessionLocal
+
+T = TypeVar("T")
+
+# 一个写操作单元：在给定会话中执行写入（不提交事务），返回值交给调用方；
+# 数据库被锁时写操作单元会被重试，因此不应有数据库以外的副作用
+WriteFn = Callable[[AsyncSession], Awaitable[T]]
+
+
+def is_lock_error(exc: BaseException) -> bool:
+    """是否为SQLite数据库被占用（busy / locked）导致的错误"""
+    if not isinstance(exc, OperationalError):
+        return False
+    message = str(exc.orig).lower()
+    return "locked" in message or "busy" in message
+
+
+class _LockRetry:
+    """数据库被占用时按带抖动的指数退避重试，直到超过截止时间"""
+    
+    def __init__(self, deadline: float, base_delay: float, max_delay: float):
+        self.deadline = deadline
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.recovered = 0
+        self.give_ups = 0
+        self.lock_wait_seconds = 0.0
+    
+    async def run(self, attempt: Callable[[], Awaitable[T]]) -> T:
+        """执行attempt，遇到锁错误时重试"""
+        first_error_at = None
+        delay = self.base_delay
+        while True:
+            try:
+                result = await attempt()
+            except OperationalError as exc:
+                if not is_lock_error(exc):
+                    raise
+                now = time.monotonic()
+                if first_error_at is None:
+                    first_error_at = now
+                remaining = first_error_at + self.deadline - now
+                if remaining <= 0:
+                    self.give_ups += 1
+                    self.lock_wait_seconds += now - first_error_at
+                    raise
+                
+                # 完全抖动：在 [0, delay] 内随机等待，避免多个写操作同时重试
+                self.retries += 1
+                await asyncio.sleep(random.uniform(0, min(delay, remaining)))
+                delay = min(delay * 2, self.max_delay)
+                continue
+            
+            if first_error_at is not None:
+                self.recovered += 1
+                self.lock_wait_seconds += time.monotonic() - first_error_at
+            return result
+    
+    def stats(self) -> dict:
+        """锁争用指标"""
+        return {
+            "retries": self.retries,
+            "recovered": self.recovered,
+            "give_ups": self.give_ups,
+            "lock_wait_seconds": round(self.lock_wait_seconds, 3),
+        }
+
+
+lock_retry = _LockRetry(
+    deadline=settings.DB_LOCK_RETRY_DEADLINE_MS / 1000,
+    base_delay=settings.DB_LOCK_RETRY_BASE_DELAY_MS / 1000,
+    max_delay=settings.DB_LOCK_RETRY_MAX_DELAY_MS / 1000
+)
+register_collector("db_lock_retry", lock_retry.stats)
+
+
+class _WriteQueue:
+    """由单个后台任务串行执行全部写操作，并把同时排队的写操作合并为一次提交"""
+    
+    def __init__(self, session_factory: async_sessionmaker, max_batch: int):
+        self.max_batch = max_batch
+        self.batches = 0
+        self.writes = 0
+        self.failed = 0
+        self.largest_batch = 0
+        self._session_factory = session_factory
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self) -> None:
+        """在当前事件循环中启动写入任务"""
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            # 在空白上下文中创建写入任务，不继承首个调用方请求的上下文变量（如查询计数）
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+    
+    async def stop(self) -> None:
+        """处理完已排队的写操作后停止写入任务"""
+        if self._task is not None and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        self._queue = None
+    
+    async def submit(self, fn: WriteFn) -> T:
+        """将写操作排队，等待其所在批次提交后返回结果"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((fn, future))
+        return await future
+    
+    async def _run(self) -> None:
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+    
+            # 取出已在排队的写操作，与当前写操作合并为一批
+            batch = [item]
+            stopping = False
+            while len(batch) < self.max_batch and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+    
+            await self._commit_batch(batch)
+            if stopping:
+                return
+    
+    async def _execute_batch(self, batch: List[Tuple[WriteFn, asyncio.Future]]) -> list:
+        """在一个事务中执行一批写操作；每个写操作使用独立的SAVEPOINT，失败只回滚自身"""
+        outcomes = []
+        async with self._session_factory() as db:
+            for fn, future in batch:
+                try:
+                    async with db.begin_nested():
+                        outcomes.append((future, await fn(db), None))
+                except Exception as exc:
+                    if is_lock_error(exc):
+                        # 数据库被占用时整批回滚后重试
+                        raise
+                    outcomes.append((future, None, exc))
+            await db.commit()
+        return outcomes
+    
+    async def _commit_batch(self, batch: List[Tuple[WriteFn, asyncio.Future]]) -> None:
+        """执行并提交一批写操作，然后通知各调用方"""
+        try:
+            outcomes = await lock_retry.run(lambda: self._execute_batch(batch))
+        except Exception as exc:
+            # 提交失败时整批写操作均未生效
+            outcomes = [(future, None, exc) for _, future in batch]
+    
+        self.batches += 1
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for future, result, exc in outcomes:
+            if exc is None:
+                self.writes += 1
+            else:
+                self.failed += 1
+            # 调用方可能已取消等待
+            if future.done():
+                continue
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+    
+    def stats(self) -> dict:
+        """写入队列运行指标"""
+        return {
+            "enabled": settings.DB_WRITE_QUEUE,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "writes": self.writes,
+            "failed": self.failed,
+            "largest_batch": self.largest_batch,
+            "average_batch": round((self.writes + self.failed) / self.batches, 2) if self.batches else 0.0,
+        }
+
+
+write_queue = _WriteQueue(SessionLocal, max_batch=settings.DB_WRITE_QUEUE_MAX_BATCH)
+register_collector("write_queue", write_queue.stats)
+
+
+async def run_write(db: AsyncSession, fn: WriteFn) -> T:
+    """执行一个写操作单元并提交，返回fn的结果（fn抛出异常时其写入全部回滚）"""
+    if settings.DB_WRITE_QUEUE:
+        # 交由写入任务执行，与同时到达的其他写操作合并提交
+        return await write_queue.submit(fn)
+    
+    async def attempt() -> T:
+        try:
+            result = await fn(db)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+        return result
+    
+    return await lock_retry.run(attempt)
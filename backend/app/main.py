@@ -1,9 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import OperationalError
 
 from app.core.config import settings
-from app.db.base import Base
+from app.core.metrics import collect_metrics
+from app.core.security import hash_pool
 from app.db.session import engine
+from app.db.migrate import get_schema_version, upgrade, LATEST_VERSION
+from app.db.writer import write_queue, is_lock_error
+from app.db.query_guard import QueryCountGuard, install_query_guard
+from app.utils.cursor import NEXT_CURSOR_HEADER
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -12,12 +19,50 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
-# 异步创建数据库表
+# 检查数据库结构版本
 @app.on_event("startup")
 async def init_db():
-    async with engine.begin() as conn:
-        # 创建表（如果不存在）
-        await conn.run_sync(Base.metadata.create_all)
+    # 只读取已记录的结构版本号，版本落后时按配置自动迁移或拒绝启动
+    version = await get_schema_version(engine)
+    if version < LATEST_VERSION:
+        if not settings.DB_AUTO_MIGRATE:
+            raise RuntimeError(
+                f"Database schema version {version} is behind {LATEST_VERSION}, run `python -m app.cli migrate`"
+            )
+        await upgrade(engine)
+    
+    if settings.DB_WRITE_QUEUE:
+        # 启动写入任务
+        write_queue.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_hash_pool():
+    # 关闭密码哈希进程池
+    hash_pool.shutdown()
+
+
+@app.on_event("shutdown")
+async def shutdown_write_queue():
+    # 处理完已排队的写操作后停止写入任务
+    await write_queue.stop()
+
+
+@app.exception_handler(OperationalError)
+async def database_busy_handler(request: Request, exc: OperationalError):
+    # 数据库持续被占用、重试超时后返回503，提示客户端稍后重试
+    if is_lock_error(exc):
+        return JSONResponse(
+            status_code=503,
+            content={"detail": "Database is busy, please retry"},
+            headers={"Retry-After": "1"}
+        )
+    raise exc
+
+# 测试模式：单个请求执行的SQL语句数超过上限时请求失败，用于发现N+1查询
+if settings.QUERY_COUNT_LIMIT > 0:
+    install_query_guard()
+    app.add_middleware(QueryCountGuard, limit=settings.QUERY_COUNT_LIMIT)
 
 # 配置CORS
 app.add_middleware(
@@ -26,6 +71,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # 允许前端读取分页游标
 )
 
 # 导入并注册路由
@@ -41,3 +87,9 @@ app.include_router(stats.router, prefix=f"{settings.API_V1_STR}/stats", tags=["s
 def root():
     """根路径"""
     return {"message": "Welcome to StudyTracker API"}
+
+
+@app.get("/metrics")
+def metrics():
+    """当前进程的运行指标"""
+    return collect_metrics()
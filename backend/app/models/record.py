@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -7,6 +7,14 @@ from app.db.base import Base
 
 class StudyRecord(Base):
     __tablename__ = "study_records"
+    __table_args__ = (
+        # 统计与列表查询均按用户+日期范围过滤
+        Index("ix_study_records_user_date", "user_id", "record_date"),
+        # 按任务统计时按用户+任务+日期范围过滤
+        Index("ix_study_records_user_task_date", "user_id", "task_id", "record_date"),
+        # 删除任务时外键检查按任务查找引用它的记录
+        Index("ix_study_records_task", "task_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -15,6 +23,6 @@ class StudyRecord(Base):
     duration = Column(Integer, nullable=False)  # 学习分钟数
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
-    # 关系
-    user = relationship("User", back_populates="study_records")
-    task = relationship("Task", back_populates="study_records")
+    # 关系（默认禁止隐式懒加载，需要时在查询中显式指定加载方式）
+    user = relationship("User", back_populates="study_records", lazy="raise")
+    task = relationship("Task", back_populates="study_records", lazy="raise")
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class RefreshToken(Base):
+    """刷新令牌（仅保存哈希值，每次使用后轮换）"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)  # 令牌的SHA-256哈希
+    expires_at = Column(DateTime, nullable=False)  # 过期时间（UTC）
+    revoked_at = Column(DateTime, nullable=True)  # 吊销时间（UTC），未吊销为空
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, Index
+
+from app.db.base import Base
+
+
+class UserDailyTotal(Base):
+    """用户每日学习汇总（由学习记录的增删改增量维护）"""
+    __tablename__ = "user_daily_totals"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    minutes = Column(Integer, nullable=False, default=0)  # 当日学习分钟数
+    record_count = Column(Integer, nullable=False, default=0)  # 当日学习记录数
+
+
+class TaskDailyTotal(Base):
+    """用户每日各任务学习汇总（由学习记录的增删改增量维护）"""
+    __tablename__ = "task_daily_totals"
+    __table_args__ = (
+        # 删除任务时外键检查按任务查找引用它的汇总行
+        Index("ix_task_daily_totals_task", "task_id"),
+    )
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    task_id = Column(Integer, ForeignKey("tasks.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    minutes = Column(Integer, nullable=False, default=0)  # 当日该任务学习分钟数
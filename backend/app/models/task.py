@@ -1,21 +1,29 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, text
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 
 from app.db.base import Base
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # 任务列表按用户过滤，并可按状态、优先级筛选
+        Index("ix_tasks_user_status_priority", "user_id", "status", "priority"),
+        # 任务列表按创建时间做游标分页
+        Index("ix_tasks_user_created", "user_id", "created_at"),
+        # SQLite 以文本存储时间且格式不一（有无微秒），按规范化到秒的时间排序与比较
+        Index("ix_tasks_user_created_seconds", "user_id", func.datetime(text("created_at"))).ddl_if(dialect="sqlite"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(100), nullable=False)
-    description = Column(Text, nullable=True)
+    description = deferred(Column(Text, nullable=True))  # 长文本，加载任务实体时默认不读取，需要时显式undefer
     priority = Column(Integer, nullable=False, default=1)  # 1低 2中 3高
     status = Column(Integer, nullable=False, default=0)  # 0未开始 1进行中 2完成
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
-    # 关系
-    user = relationship("User", back_populates="tasks")
-    study_records = relationship("StudyRecord", back_populates="task")
+    # 关系（默认禁止隐式懒加载，需要时在查询中显式指定加载方式）
+    user = relationship("User", back_populates="tasks", lazy="raise")
+    study_records = relationship("StudyRecord", back_populates="task", lazy="raise")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
@@ -7,13 +7,17 @@ from app.db.base import Base
 
 class User(Base):
     __tablename__ = "users"
-    
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     
-    # 关系
-    tasks = relationship("Task", back_populates="user")
-    study_records = relationship("StudyRecord", back_populates="user")
+    __table_args__ = (
+        # 邮箱不区分大小写唯一，按邮箱查找时同样走索引
+        Index("ix_users_email_lower", func.lower(email), unique=True),
+    )
+    
+    # 关系（默认禁止隐式懒加载，需要时在查询中显式指定加载方式）
+    tasks = relationship("Task", back_populates="user", lazy="raise")
+    study_records = relationship("StudyRecord", back_populates="user", lazy="raise")
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime, date
-from typing import Optional
+from typing import Optional, List
+from typing_extensions import TypedDict
 
 
 # 学习记录基础信息
@@ -30,3 +31,34 @@ class StudyRecordResponse(StudyRecordBase):
     
     class Config:
         from_attributes = True
+
+
+# 学习记录列表行（列表接口直接由查询结果行序列化，可只包含部分字段，字段与StudyRecordResponse一致）
+class StudyRecordRow(TypedDict, total=False):
+    task_id: int
+    record_date: date
+    duration: int
+    id: int
+    user_id: int
+    created_at: datetime
+
+
+# 展开所属任务（expand=task）的学习记录列表行
+class StudyRecordWithTaskRow(StudyRecordRow, total=False):
+    task_title: Optional[str]  # 所属任务已删除时为null
+    task_priority: Optional[int]
+    task_status: Optional[int]
+
+
+# 批量创建中单条记录的结果
+class StudyRecordBulkItemResult(BaseModel):
+    index: int  # 在请求列表中的位置
+    id: Optional[int] = None  # 创建成功时的记录ID
+    error: Optional[str] = None  # 创建失败的原因
+
+
+# 批量创建响应
+class StudyRecordBulkResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[StudyRecordBulkItemResult]
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
+from typing_extensions import TypedDict
 
 
 # 任务基础信息
@@ -32,3 +33,14 @@ class TaskResponse(TaskBase):
     
     class Config:
         from_attributes = True
+
+
+# 任务列表行（列表接口直接由查询结果行序列化，可只包含部分字段，字段与TaskResponse一致）
+class TaskRow(TypedDict, total=False):
+    title: str
+    description: Optional[str]
+    priority: int
+    status: Optional[int]
+    id: int
+    user_id: int
+    created_at: datetime
@@ -32,9 +32,22 @@ class UserLogin(BaseModel):
 # 令牌数据
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
+
+
+# 当前请求的用户身份（由令牌解析得到，无需查询数据库）
+class Principal(BaseModel):
+    id: int
+    username: str
 
 
 # 令牌响应
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+
+
+# 刷新令牌请求
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
@@ -0,0 +1,72 @@
+from typing import Optional
+from datetime import datetime, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import create_access_token, generate_refresh_token, hash_token
+from app.db.writer import run_write
+from app.crud.refresh_token import (
+    create_refresh_token, get_refresh_token, revoke_refresh_token, revoke_user_refresh_tokens
+)
+from app.schemas.user import Token
+
+
+def _new_tokens(user_id: int, username: str) -> Token:
+    """生成访问令牌与新的刷新令牌（尚未保存）"""
+    access_token = create_access_token(
+        data={"sub": username, "uid": user_id},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return Token(access_token=access_token, refresh_token=generate_refresh_token())
+
+
+async def _save_refresh_token(db: AsyncSession, user_id: int, token: Token) -> None:
+    """保存刷新令牌（不提交事务）"""
+    await create_refresh_token(
+        db,
+        user_id=user_id,
+        token_hash=hash_token(token.refresh_token),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+
+async def issue_tokens(db: AsyncSession, user_id: int, username: str) -> Token:
+    """签发访问令牌与新的刷新令牌"""
+    token = _new_tokens(user_id, username)
+    await run_write(db, lambda session: _save_refresh_token(session, user_id, token))
+    return token
+
+
+async def rotate_refresh_token(db: AsyncSession, refresh_token: str) -> Optional[Token]:
+    """使用刷新令牌换取新的令牌对，旧刷新令牌随即吊销；令牌无效时返回None"""
+    # 按令牌哈希一次索引查找，吊销状态与过期时间都在同一行中
+    stored = await get_refresh_token(db, hash_token(refresh_token))
+    if stored is None or stored.expires_at <= datetime.utcnow():
+        return None
+    
+    if stored.revoked_at is not None:
+        # 已轮换的令牌被再次使用，可能已泄露，吊销该用户的全部刷新令牌
+        await run_write(db, lambda session: revoke_user_refresh_tokens(session, stored.user_id))
+        return None
+    
+    token = _new_tokens(stored.user_id, stored.username)
+    
+    async def write(session: AsyncSession) -> Optional[str]:
+        # 条件更新保证同一令牌只能被使用一次（包括其他进程已吊销的情况），吊销成功才保存新令牌
+        revoked_hash = await revoke_refresh_token(session, stored.id)
+        if revoked_hash is not None:
+            await _save_refresh_token(session, stored.user_id, token)
+        return revoked_hash
+    
+    if await run_write(db, write) is None:
+        return None
+    return token
+
+
+async def revoke_token(db: AsyncSession, refresh_token: str) -> None:
+    """吊销刷新令牌"""
+    stored = await get_refresh_token(db, hash_token(refresh_token))
+    if stored is None:
+        return
+    
+    await run_write(db, lambda session: revoke_refresh_token(session, stored.id))
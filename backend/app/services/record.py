@@ -1,45 +1,108 @@
-from typing import Optional, List
+from typing import Optional, List, Any, Dict
 from datetime import date
-from sqlalchemy.orm import Session
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
 
 from app.models.record import StudyRecord
 from app.models.task import Task
-from app.schemas.record import StudyRecordCreate, StudyRecordUpdate
-from app.crud.record import create_record as crud_create_record, get_records_by_date_range
+from app.models.rollup import TaskDailyTotal
+from app.schemas.record import StudyRecordCreate, StudyRecordUpdate, StudyRecordBulkItemResult, StudyRecordBulkResponse
+from app.crud.record import (
+    create_record as crud_create_record, update_record as crud_update_record, create_records_bulk, get_records_by_date_range
+)
 
+# 批量创建时一次性校验整个列表
+_bulk_adapter = TypeAdapter(List[StudyRecordCreate])
 
-def create_record(db: Session, record_in: StudyRecordCreate, user_id: int) -> StudyRecord:
-    """创建学习记录"""
-    # 验证任务是否存在且属于当前用户
-    task = db.query(Task).filter(Task.id == record_in.task_id, Task.user_id == user_id).first()
-    if not task:
+
+async def _check_task_owned(db: AsyncSession, task_id: int, user_id: int) -> None:
+    """验证任务是否存在且属于当前用户"""
+    result = await db.execute(select(Task.id).where(Task.id == task_id, Task.user_id == user_id))
+    if result.scalar() is None:
         raise ValueError("Task not found or not owned by user")
+
+
+async def create_record(db: AsyncSession, record_in: StudyRecordCreate, user_id: int) -> StudyRecord:
+    """创建学习记录"""
+    await _check_task_owned(db, record_in.task_id, user_id)
+    return await crud_create_record(db, record_in=record_in, user_id=user_id)
+
+
+async def update_record(db: AsyncSession, record_id: int, record_in: StudyRecordUpdate, user_id: int) -> Optional[StudyRecord]:
+    """更新学习记录（更换所属任务时同样验证任务归属）"""
+    if record_in.task_id is not None:
+        await _check_task_owned(db, record_in.task_id, user_id)
+    return await crud_update_record(db, record_id=record_id, record_in=record_in, user_id=user_id)
+
+
+def _validate_bulk_items(items: List[Any]) -> Dict[int, Any]:
+    """校验批量创建的原始数据，返回 位置 -> StudyRecordCreate 或错误信息"""
+    try:
+        return dict(enumerate(_bulk_adapter.validate_python(items)))
+    except ValidationError as exc:
+        # 记录出错条目的首个错误，其余条目再整体校验一次
+        outcomes = {}
+        for error in exc.errors():
+            index, *field = error["loc"]
+            outcomes.setdefault(index, f"{'.'.join(map(str, field)) or 'item'}: {error['msg']}")
+        valid = [index for index in range(len(items)) if index not in outcomes]
+        outcomes.update(zip(valid, _bulk_adapter.validate_python([items[index] for index in valid])))
+        return outcomes
+
+
+async def bulk_create_records(db: AsyncSession, items: List[Any], user_id: int) -> StudyRecordBulkResponse:
+    """批量创建学习记录，逐条返回创建结果"""
+    outcomes = _validate_bulk_items(items)
+    valid = {index: record_in for index, record_in in outcomes.items() if isinstance(record_in, StudyRecordCreate)}
     
-    return crud_create_record(db, record_in=record_in, user_id=user_id)
+    # 一次查询验证所有任务是否属于当前用户
+    task_ids = {record_in.task_id for record_in in valid.values()}
+    owned_task_ids = set()
+    if task_ids:
+        result = await db.execute(select(Task.id).where(Task.user_id == user_id, Task.id.in_(task_ids)))
+        owned_task_ids = set(result.scalars().all())
+    for index, record_in in list(valid.items()):
+        if record_in.task_id not in owned_task_ids:
+            outcomes[index] = "Task not found or not owned by user"
+            del valid[index]
+    
+    record_ids = await create_records_bulk(db, list(valid.values()), user_id=user_id)
+    outcomes.update(zip(valid.keys(), record_ids))
+    
+    results = [
+        StudyRecordBulkItemResult(index=index, id=outcome)
+        if isinstance(outcome, int) else StudyRecordBulkItemResult(index=index, error=outcome)
+        for index, outcome in sorted(outcomes.items())
+    ]
+    return StudyRecordBulkResponse(
+        created=len(record_ids),
+        failed=len(results) - len(record_ids),
+        results=results
+    )
 
 
-def get_user_records_in_date_range(db: Session, user_id: int, start_date: date, end_date: date) -> List[StudyRecord]:
+async def get_user_records_in_date_range(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> List[StudyRecord]:
     """获取用户在指定日期范围内的学习记录"""
     if start_date > end_date:
         raise ValueError("Start date must be before end date")
     
-    return get_records_by_date_range(db, user_id=user_id, start_date=start_date, end_date=end_date)
+    return await get_records_by_date_range(db, user_id=user_id, start_date=start_date, end_date=end_date)
 
 
-def get_total_minutes_by_task(db: Session, user_id: int, task_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
+async def get_total_minutes_by_task(db: AsyncSession, user_id: int, task_id: int, start_date: Optional[date] = None, end_date: Optional[date] = None) -> int:
     """获取用户在指定任务上的总学习时长"""
-    # 构建查询条件
-    query = db.query(StudyRecord).filter(
-        StudyRecord.user_id == user_id,
-        StudyRecord.task_id == task_id
+    # 从每日各任务汇总表求和，无需加载学习记录
+    stmt = select(func.sum(TaskDailyTotal.minutes)).where(
+        TaskDailyTotal.user_id == user_id,
+        TaskDailyTotal.task_id == task_id
     )
     
     # 添加日期范围条件（如果提供）
     if start_date:
-        query = query.filter(StudyRecord.record_date >= start_date)
+        stmt = stmt.where(TaskDailyTotal.day >= start_date)
     if end_date:
-        query = query.filter(StudyRecord.record_date <= end_date)
+        stmt = stmt.where(TaskDailyTotal.day <= end_date)
     
-    # 计算总学习时长
-    records = query.all()
-    return sum(record.duration for record in records)
+    result = await db.execute(stmt)
+    return result.scalar() or 0
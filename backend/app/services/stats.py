@@ -1,52 +1,119 @@
-from typing import List, Dict, Tuple
+import asyncio
+from typing import List, Dict, Set, Tuple, Callable, Awaitable, TypeVar
 from datetime import date, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, distinct, cast, Float, Integer, String, Date, literal, null, union_all
 
-from app.models.record import StudyRecord
+from app.core.config import settings
+from app.core.metrics import register_collector
+from app.db.session import ReadSessionLocal
 from app.models.task import Task
-from app.schemas.stats import DailyStats, TaskStats, TotalStats
+from app.models.rollup import UserDailyTotal, TaskDailyTotal
+from app.schemas.stats import DailyStats, TaskStats, TotalStats, StatsResponse
+from app.utils.cache import TTLCache
 
+T = TypeVar("T")
 
-async def get_daily_stats(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> List[DailyStats]:
-    """获取指定日期范围内的每日学习统计"""
-    # 查询每日总学习时长
-    stmt = select(
-        StudyRecord.record_date,
-        func.sum(StudyRecord.duration).label("total_minutes")
+# 统计结果缓存，键为 (user_id, endpoint, start_date, end_date)，学习记录或任务变更时按用户失效
+stats_cache = TTLCache(maxsize=settings.STATS_CACHE_MAX_SIZE, ttl=settings.STATS_CACHE_TTL_SECONDS)
+register_collector("stats_cache", stats_cache.stats)
+
+class _PendingLoad:
+    """一次进行中的统计计算；期间该用户的缓存失效时标记为过期"""
+    stale = False
+
+
+# 各用户进行中的统计计算，计算结束即移除，大小只与并发计算数有关
+_pending_loads: Dict[int, Set[_PendingLoad]] = {}
+
+
+async def get_cached_stats(
+    user_id: int,
+    endpoint: str,
+    start_date: date,
+    end_date: date,
+    loader: Callable[[], Awaitable[T]]
+) -> T:
+    """优先从缓存读取统计结果，未命中时调用loader计算并写入缓存"""
+    key = (user_id, endpoint, start_date, end_date)
+    value = stats_cache.get(key)
+    if value is None:
+        load = _PendingLoad()
+        pending = _pending_loads.setdefault(user_id, set())
+        pending.add(load)
+        try:
+            value = await loader()
+        finally:
+            pending.discard(load)
+            if not pending and _pending_loads.get(user_id) is pending:
+                del _pending_loads[user_id]
+        # 计算期间若该用户数据已变更，则不缓存可能过期的结果
+        if not load.stale:
+            stats_cache.set(key, value, group=user_id)
+    return value
+
+
+def invalidate_user_stats(user_id: int) -> None:
+    """学习数据变更后使该用户的统计缓存失效"""
+    for load in _pending_loads.get(user_id, ()):
+        load.stale = True
+    stats_cache.invalidate_group(user_id)
+
+
+def get_weekly_date_range(weeks: int) -> Tuple[date, date]:
+    """计算最近几周统计的日期范围"""
+    end_date = date.today()
+    return end_date - timedelta(weeks=weeks), end_date
+
+
+def _daily_stmt(user_id: int, start_date: date, end_date: date):
+    """每日学习时长查询（每个有记录的日期一行）"""
+    return select(
+        UserDailyTotal.day,
+        UserDailyTotal.minutes
     ).where(
-        StudyRecord.user_id == user_id,
-        StudyRecord.record_date >= start_date,
-        StudyRecord.record_date <= end_date
-    ).group_by(StudyRecord.record_date).order_by(StudyRecord.record_date)
-    
-    result = await db.execute(stmt)
-    daily_stats = result.all()
-    
-    # 将结果转换为DailyStats对象列表
-    return [DailyStats(date=stat.record_date, total_minutes=stat.total_minutes) for stat in daily_stats]
+        UserDailyTotal.user_id == user_id,
+        UserDailyTotal.day >= start_date,
+        UserDailyTotal.day <= end_date,
+        UserDailyTotal.record_count > 0
+    )
 
 
-async def get_task_stats(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> List[TaskStats]:
-    """获取指定日期范围内的任务学习时间统计"""
-    # 查询各任务的总学习时长
-    stmt = select(
-        StudyRecord.task_id,
+def _task_stmt(user_id: int, start_date: date, end_date: date):
+    """各任务学习时长查询（每个任务一行）"""
+    minutes = func.sum(TaskDailyTotal.minutes)
+    return select(
+        TaskDailyTotal.task_id,
         Task.title.label("task_title"),
-        func.sum(StudyRecord.duration).label("minutes")
-    ).join(Task, StudyRecord.task_id == Task.id).where(
-        StudyRecord.user_id == user_id,
-        StudyRecord.record_date >= start_date,
-        StudyRecord.record_date <= end_date
-    ).group_by(StudyRecord.task_id, Task.title).order_by(func.sum(StudyRecord.duration).desc())
-    
-    result = await db.execute(stmt)
-    task_stats = result.all()
-    
+        minutes.label("minutes")
+    ).join(Task, TaskDailyTotal.task_id == Task.id).where(
+        TaskDailyTotal.user_id == user_id,
+        TaskDailyTotal.day >= start_date,
+        TaskDailyTotal.day <= end_date
+    ).group_by(TaskDailyTotal.task_id, Task.title).having(minutes > 0)
+
+
+def _total_stmt(user_id: int, start_date: date, end_date: date):
+    """总学习统计查询（单行聚合）"""
+    total_minutes = func.coalesce(func.sum(UserDailyTotal.minutes), 0)
+    study_days = func.count(distinct(UserDailyTotal.day))
+    return select(
+        total_minutes.label("total_minutes"),
+        study_days.label("study_days"),
+        func.coalesce(cast(total_minutes, Float) / func.nullif(study_days, 0), 0.0).label("average_minutes_per_day")
+    ).where(
+        UserDailyTotal.user_id == user_id,
+        UserDailyTotal.day >= start_date,
+        UserDailyTotal.day <= end_date,
+        UserDailyTotal.record_count > 0
+    )
+
+
+def _build_task_stats(task_stats) -> List[TaskStats]:
+    """将各任务学习时长转换为TaskStats列表，并计算百分比"""
     # 计算总学习时长
     total_minutes = sum(stat.minutes for stat in task_stats) if task_stats else 0
     
-    # 将结果转换为TaskStats对象列表，并计算百分比
     result = []
     for stat in task_stats:
         percentage = (stat.minutes / total_minutes * 100) if total_minutes > 0 else 0.0
@@ -60,42 +127,119 @@ async def get_task_stats(db: AsyncSession, user_id: int, start_date: date, end_d
     return result
 
 
-async def get_total_stats(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> TotalStats:
-    """获取指定日期范围内的总学习统计"""
-    # 获取所有学习记录
-    stmt = select(StudyRecord).where(
-        StudyRecord.user_id == user_id,
-        StudyRecord.record_date >= start_date,
-        StudyRecord.record_date <= end_date
+def _build_total_stats(stat) -> TotalStats:
+    """将聚合结果转换为TotalStats"""
+    return TotalStats(
+        total_minutes=stat.total_minutes,
+        total_days=stat.study_days,
+        average_minutes_per_day=round(stat.average_minutes_per_day, 2)
     )
+
+
+async def get_daily_stats(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> List[DailyStats]:
+    """获取指定日期范围内的每日学习统计"""
+    # 直接读取每日汇总表，每天仅一行
+    stmt = _daily_stmt(user_id, start_date, end_date).order_by(UserDailyTotal.day)
     
     result = await db.execute(stmt)
-    records = result.scalars().all()
+    daily_stats = result.all()
     
-    # 计算总学习时长
-    total_minutes = sum(record.duration for record in records)
+    # 将结果转换为DailyStats对象列表
+    return [DailyStats(date=stat.day, total_minutes=stat.minutes) for stat in daily_stats]
+
+
+async def get_task_stats(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> List[TaskStats]:
+    """获取指定日期范围内的任务学习时间统计"""
+    # 从每日各任务汇总表查询各任务的总学习时长
+    stmt = _task_stmt(user_id, start_date, end_date).order_by(func.sum(TaskDailyTotal.minutes).desc())
     
-    # 计算学习天数（去重）
-    study_days = len(set(record.record_date for record in records))
+    result = await db.execute(stmt)
+    return _build_task_stats(result.all())
+
+
+async def get_total_stats(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> TotalStats:
+    """获取指定日期范围内的总学习统计"""
+    # 总时长、学习天数与日均时长在数据库中一次聚合完成
+    result = await db.execute(_total_stmt(user_id, start_date, end_date))
+    return _build_total_stats(result.one())
+
+
+async def get_combined_stats(db: AsyncSession, user_id: int, start_date: date, end_date: date) -> StatsResponse:
+    """一次查询同时获取每日、各任务与总学习统计"""
+    daily = _daily_stmt(user_id, start_date, end_date).cte("daily_stats")
+    tasks = _task_stmt(user_id, start_date, end_date).cte("task_stats")
+    total = _total_stmt(user_id, start_date, end_date).cte("total_stats")
     
-    # 计算平均每日学习时长
-    average_minutes_per_day = total_minutes / study_days if study_days > 0 else 0.0
+    # 三类结果通过 kind 列区分，以 UNION ALL 合并为一个结果集
+    stmt = union_all(
+        select(
+            literal("daily").label("kind"),
+            daily.c.day,
+            cast(null(), Integer).label("task_id"),
+            cast(null(), String).label("task_title"),
+            daily.c.minutes,
+            cast(null(), Integer).label("study_days"),
+            cast(null(), Float).label("average_minutes_per_day")
+        ),
+        select(
+            literal("task"),
+            cast(null(), Date),
+            tasks.c.task_id,
+            tasks.c.task_title,
+            tasks.c.minutes,
+            cast(null(), Integer),
+            cast(null(), Float)
+        ),
+        select(
+            literal("total"),
+            cast(null(), Date),
+            cast(null(), Integer),
+            cast(null(), String),
+            total.c.total_minutes,
+            total.c.study_days,
+            total.c.average_minutes_per_day
+        )
+    )
     
-    return TotalStats(
-        total_minutes=total_minutes,
-        total_days=study_days,
-        average_minutes_per_day=round(average_minutes_per_day, 2)
+    result = await db.execute(stmt)
+    rows = result.all()
+    
+    daily_rows = sorted((row for row in rows if row.kind == "daily"), key=lambda row: row.day)
+    task_rows = sorted((row for row in rows if row.kind == "task"), key=lambda row: row.minutes, reverse=True)
+    total_row = next(row for row in rows if row.kind == "total")
+    
+    return StatsResponse(
+        daily=[DailyStats(date=row.day, total_minutes=row.minutes) for row in daily_rows],
+        tasks=_build_task_stats(task_rows),
+        total=TotalStats(
+            total_minutes=total_row.minutes,
+            total_days=total_row.study_days,
+            average_minutes_per_day=round(total_row.average_minutes_per_day, 2)
+        )
     )
 
 
-async def get_weekly_stats(db: AsyncSession, user_id: int, weeks: int = 4) -> Dict[str, any]:
+async def _run_in_new_session(func, *args):
+    """在独立的只读会话中执行统计查询"""
+    async with ReadSessionLocal() as db:
+        return await func(db, *args)
+
+
+async def get_concurrent_stats(user_id: int, start_date: date, end_date: date) -> StatsResponse:
+    """在三个独立会话上并发获取每日、各任务与总学习统计"""
+    daily, tasks, total = await asyncio.gather(
+        _run_in_new_session(get_daily_stats, user_id, start_date, end_date),
+        _run_in_new_session(get_task_stats, user_id, start_date, end_date),
+        _run_in_new_session(get_total_stats, user_id, start_date, end_date)
+    )
+    return StatsResponse(daily=daily, tasks=tasks, total=total)
+
+
+async def get_weekly_stats(db: AsyncSession, user_id: int, weeks: int = 4) -> StatsResponse:
     """获取最近几周的学习统计"""
     # 计算日期范围
-    end_date = date.today()
-    start_date = end_date - timedelta(weeks=weeks)
+    start_date, end_date = get_weekly_date_range(weeks)
     
-    return {
-        "daily": await get_daily_stats(db, user_id, start_date, end_date),
-        "tasks": await get_task_stats(db, user_id, start_date, end_date),
-        "total": await get_total_stats(db, user_id, start_date, end_date)
-    }
+    if settings.STATS_WEEKLY_STRATEGY == "concurrent":
+        return await get_concurrent_stats(user_id, start_date, end_date)
+    return await get_combined_stats(db, user_id, start_date, end_date)
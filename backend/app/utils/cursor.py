@@ -0,0 +1,28 @@
+import base64
+import json
+from datetime import date
+
+# 返回下一页游标的响应头
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """将排序键编码为不透明的分页游标"""
+    payload = [value.isoformat() if isinstance(value, date) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """解码分页游标，并按给定类型还原各排序键（格式不合法时抛出ValueError）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("Cursor has wrong shape")
+        return tuple(
+            type_.fromisoformat(value) if issubclass(type_, date) else type_(value)
+            for type_, value in zip(types, values)
+        )
+    except (TypeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
@@ -0,0 +1,44 @@
+from typing import Any, List, Optional, Sequence
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+def parse_fields(fields: Optional[str], allowed: Sequence[str]) -> Optional[List[str]]:
+    """解析以逗号分隔的字段列表，未指定时返回None，包含未知字段时抛出ValueError"""
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    if not names:
+        raise ValueError("No fields requested")
+    for name in names:
+        if name not in allowed:
+            raise ValueError(f"Unknown field: {name}")
+    return names
+
+
+def row_dicts(rows: Sequence[Any], fields: Optional[Sequence[str]] = None) -> List[dict]:
+    """将查询结果行转换为字典列表（键按查询列的顺序）"""
+    if not rows:
+        return []
+    # 列名只取一次后按位置组装字典，比逐行调用 Row._asdict() 快数倍
+    keys = rows[0]._fields
+    if fields is None:
+        return [dict(zip(keys, row)) for row in rows]
+    # 稀疏字段集：只输出所选字段（游标分页使用的列不在所选字段中时也不输出）
+    selected = [(index, key) for index, key in enumerate(keys) if key in fields]
+    return [{key: row[index] for index, key in selected} for row in rows]
+
+
+def json_rows_response(
+    adapter: TypeAdapter,
+    rows: Sequence[Any],
+    response: Response,
+    fields: Optional[Sequence[str]] = None
+) -> Response:
+    """将查询结果行直接序列化为JSON响应，跳过逐行的响应模型校验（保留response上已设置的响应头）"""
+    items = row_dicts(rows, fields)
+    return Response(
+        content=adapter.dump_json(items),
+        media_type="application/json",
+        headers=dict(response.headers)
+    )
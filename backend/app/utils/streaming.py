@@ -0,0 +1,23 @@
+from typing import AsyncIterable, AsyncIterator, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+async def iter_json_array(
+    items: AsyncIterable[T],
+    encode: Callable[[T], bytes],
+    chunk_size: int = 500
+) -> AsyncIterator[bytes]:
+    """将异步序列编码为JSON数组，按chunk_size个元素分块输出"""
+    buffer = []
+    first = True
+    yield b"["
+    async for item in items:
+        buffer.append(encode(item))
+        if len(buffer) >= chunk_size:
+            yield (b"" if first else b",") + b",".join(buffer)
+            buffer.clear()
+            first = False
+    if buffer:
+        yield (b"" if first else b",") + b",".join(buffer)
+    yield b"]"
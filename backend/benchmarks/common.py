@@ -0,0 +1,82 @@
+"""基准测试的公共工具：每个配置在独立子进程与临时数据库中运行，结果以JSON传回
+
+配置项在导入 app 时读取，因此开关对比（如写入队列、SQLite PRAGMA）需要在不同进程中分别运行。
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional, Sequence, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_FLAG = "--worker"
+
+
+def is_worker() -> bool:
+    """当前进程是否为运行单个配置的子进程"""
+    return WORKER_FLAG in sys.argv
+
+
+def run_variant(module: str, env: Dict[str, str], args: Sequence[str] = ()) -> dict:
+    """在子进程中以给定环境变量运行基准的一个配置，返回子进程最后一行输出的JSON结果"""
+    with tempfile.TemporaryDirectory() as tmp:
+        full_env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/benchmark.db",
+            **env,
+        }
+        completed = subprocess.run(
+            [sys.executable, "-m", module, WORKER_FLAG, *args],
+            cwd=BACKEND_DIR, env=full_env, capture_output=True, text=True
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{module} {' '.join(args)} failed:\n{completed.stderr}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def emit(result: dict) -> None:
+    """子进程输出结果"""
+    print(json.dumps(result))
+
+
+def percentile(values: List[float], p: float) -> float:
+    """计算百分位数（最近秩法），values为空时返回0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+async def prepare_database(task_count: int = 1, username: str = "bench") -> Tuple[int, List[int]]:
+    """迁移临时数据库并创建一个用户及其任务，返回 (用户ID, 任务ID列表)"""
+    from sqlalchemy import insert
+
+    from app.db.migrate import upgrade
+    from app.db.session import engine, SessionLocal
+    from app.models.task import Task
+    from app.models.user import User
+
+    await upgrade(engine)
+    async with SessionLocal() as db:
+        user_id = (await db.execute(
+            insert(User).values(username=username, email=f"{username}@example.com", password_hash="x").returning(User.id)
+        )).scalar()
+        task_ids = (await db.execute(
+            insert(Task).returning(Task.id),
+            [{"user_id": user_id, "title": f"task {index}", "priority": 1} for index in range(task_count)]
+        )).scalars().all()
+        await db.commit()
+    return user_id, list(task_ids)
+
+
+def print_table(headers: Sequence[str], rows: Sequence[Sequence[object]], note: Optional[str] = None) -> None:
+    """按列对齐打印结果表"""
+    cells = [[str(cell) for cell in row] for row in rows]
+    widths = [max(len(header), *(len(row[index]) for row in cells)) for index, header in enumerate(headers)]
+    print("  ".join(header.rjust(width) for header, width in zip(headers, widths)))
+    for row in cells:
+        print("  ".join(cell.rjust(width) for cell, width in zip(row, widths)))
+    if note:
+        print(note)
@@ -0,0 +1,122 @@
+"""登录风暴基准：大量并发登录时 GET /tasks 的延迟，对比进程池哈希与在事件循环中直接哈希
+
+用法: python -m benchmarks.login_storm [--logins 20] [--readers 10] [--duration 5] [--rounds 12]
+
+应用在进程内通过 httpx 的 ASGITransport 调用。登录客户端循环调用 /auth/login（每次一次bcrypt验证），
+读取客户端循环调用 /tasks，统计 /tasks 的 p50/p99 延迟与每秒登录数。
+inline 配置把密码哈希放回事件循环中同步执行（进程池之前的做法），作为对照。
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import emit, is_worker, percentile, prepare_database, print_table, run_variant
+
+VARIANTS = ("pool", "inline")
+PASSWORD = "benchmark-password"
+
+
+async def worker(mode: str, logins: int, readers: int, duration: float) -> dict:
+    import app.db.base  # noqa: F401  先注册全部模型
+    import httpx
+    from sqlalchemy import update
+
+    from app.core.config import settings
+    from app.core.security import get_password_hash, hash_pool
+    from app.db.session import SessionLocal
+    from app.main import app
+    from app.models.user import User
+
+    user_id, _ = await prepare_database(task_count=20)
+    async with SessionLocal() as db:
+        await db.execute(update(User).where(User.id == user_id).values(password_hash=get_password_hash(PASSWORD)))
+        await db.commit()
+
+    if mode == "inline":
+        async def run_inline(func, *args):
+            return func(*args)
+        hash_pool.run = run_inline
+
+    login_form = {"username": "bench", "password": PASSWORD}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # 预热：启动进程池并取得访问令牌
+        response = await client.post(f"{settings.API_V1_STR}/auth/login", data=login_form)
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        (await client.get(f"{settings.API_V1_STR}/tasks/", headers=headers)).raise_for_status()
+
+        task_latencies = []
+        login_count = 0
+        errors = 0
+        deadline = time.perf_counter() + duration
+
+        async def login_client() -> None:
+            nonlocal login_count, errors
+            while time.perf_counter() < deadline:
+                response = await client.post(f"{settings.API_V1_STR}/auth/login", data=login_form)
+                if response.status_code == 200:
+                    login_count += 1
+                else:
+                    errors += 1
+
+        async def task_reader() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                response = await client.get(f"{settings.API_V1_STR}/tasks/", headers=headers)
+                if response.status_code != 200:
+                    errors += 1
+                    continue
+                task_latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(login_client() for _ in range(logins)),
+            *(task_reader() for _ in range(readers))
+        )
+        elapsed = time.perf_counter() - start
+    hash_pool.shutdown()
+
+    return {
+        "logins_per_second": login_count / elapsed,
+        "tasks_requests": len(task_latencies),
+        "tasks_p50_ms": percentile(task_latencies, 50) * 1000,
+        "tasks_p99_ms": percentile(task_latencies, 99) * 1000,
+        "tasks_max_ms": max(task_latencies, default=0) * 1000,
+        "errors": errors,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.login_storm", description=__doc__.split("\n")[0])
+    parser.add_argument("--logins", type=int, default=20, help="concurrent login clients")
+    parser.add_argument("--readers", type=int, default=10, help="concurrent GET /tasks clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run each measurement")
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor")
+    parser.add_argument("--mode", choices=VARIANTS, default="pool", help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if is_worker():
+        emit(asyncio.run(worker(args.mode, args.logins, args.readers, args.duration)))
+        return
+
+    rows = []
+    for mode in VARIANTS:
+        result = run_variant(
+            "benchmarks.login_storm", {"PASSWORD_BCRYPT_ROUNDS": str(args.rounds)}, [
+                "--mode", mode, "--logins", str(args.logins), "--readers", str(args.readers),
+                "--duration", str(args.duration)
+            ]
+        )
+        rows.append([
+            mode, f"{result['logins_per_second']:.1f}", result["tasks_requests"],
+            f"{result['tasks_p50_ms']:.1f}", f"{result['tasks_p99_ms']:.1f}", f"{result['tasks_max_ms']:.1f}",
+            result["errors"]
+        ])
+    print_table(["hashing", "logins/s", "/tasks requests", "p50 ms", "p99 ms", "max ms", "errors"], rows)
+
+
+if __name__ == "__main__":
+    main()
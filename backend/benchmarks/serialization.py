@@ -0,0 +1,123 @@
+"""列表序列化基准：响应模型校验路径与 FAST_JSON_LISTS 直接序列化路径
+
+用法: python -m benchmarks.serialization [--rows 100 1000 5000] [--repeat 200000]
+
+对同一页数据分别计时：
+- response_model：ORM实体经FastAPI按响应模型逐行校验（from_attributes）后由标准库json编码
+- fast：查询结果行经 TypeAdapter.dump_json 直接编码为响应体
+serialize 列只计序列化，end-to-end 列包括查询与加载（ORM实体或结果行）。两条路径的输出逐字节比较。
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+from typing import List
+
+from benchmarks.common import emit, is_worker, prepare_database, print_table, run_variant
+
+
+async def _timed(fn, repeat: int) -> float:
+    """重复执行异步函数，返回平均耗时（毫秒）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def worker(rows: List[int], repeat: int) -> dict:
+    import app.db.base  # noqa: F401  先注册全部模型
+    from fastapi import Response
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_model_field
+    from sqlalchemy import insert
+
+    from app.api.v1.record import _record_rows
+    from app.crud.record import get_records, record_list_columns
+    from app.db.session import SessionLocal
+    from app.models.record import StudyRecord
+    from app.schemas.record import StudyRecordResponse
+    from app.utils.serialization import json_rows_response
+
+    user_id, (task_id,) = await prepare_database()
+    async with SessionLocal() as db:
+        await db.execute(insert(StudyRecord), [
+            {"user_id": user_id, "task_id": task_id, "record_date": date(2020, 1, 1) + timedelta(days=index), "duration": 30}
+            for index in range(max(rows))
+        ])
+        await db.commit()
+
+    # 与路由 response_model=List[StudyRecordResponse] 相同的响应字段
+    field = create_model_field(name="Response_read_records", type_=List[StudyRecordResponse], mode="serialization")
+
+    results = {}
+    async with SessionLocal() as db:
+        for count in rows:
+            columns = record_list_columns()
+
+            async def fetch_entities():
+                return await get_records(db, user_id=user_id, limit=count)
+
+            async def fetch_rows():
+                return await get_records(db, user_id=user_id, limit=count, columns=columns)
+
+            entities, page = await fetch_entities(), await fetch_rows()
+
+            async def slow_serialize(records=entities) -> bytes:
+                content = await serialize_response(field=field, response_content=records, is_coroutine=True)
+                return JSONResponse(content).body
+
+            async def fast_serialize(records=page) -> bytes:
+                return json_rows_response(_record_rows, records, Response()).body
+
+            async def slow_end_to_end() -> bytes:
+                return await slow_serialize(await fetch_entities())
+
+            async def fast_end_to_end() -> bytes:
+                return await fast_serialize(await fetch_rows())
+
+            identical = await slow_serialize() == await fast_serialize()
+            times = {}
+            for name, fn, scale in (
+                ("slow_serialize", slow_serialize, 1),
+                ("fast_serialize", fast_serialize, 1),
+                ("slow_end_to_end", slow_end_to_end, 4),
+                ("fast_end_to_end", fast_end_to_end, 4),
+            ):
+                times[name] = await _timed(fn, max(3, repeat // count // scale))
+            results[count] = {"identical": identical, **times}
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.serialization", description=__doc__.split("\n")[0])
+    parser.add_argument("--rows", nargs="+", type=int, default=[100, 1000, 5000], help="rows per page")
+    parser.add_argument("--repeat", type=int, default=200000, help="rows serialized per measurement")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if is_worker():
+        emit(asyncio.run(worker(args.rows, args.repeat)))
+        return
+
+    results = run_variant(
+        "benchmarks.serialization", {}, ["--rows", *map(str, args.rows), "--repeat", str(args.repeat)]
+    )
+    rows = []
+    for count, result in results.items():
+        rows.append([
+            count,
+            f"{result['slow_serialize']:.2f}", f"{result['fast_serialize']:.2f}",
+            f"{result['slow_serialize'] / result['fast_serialize']:.1f}x",
+            f"{result['slow_end_to_end']:.2f}", f"{result['fast_end_to_end']:.2f}",
+            f"{result['slow_end_to_end'] / result['fast_end_to_end']:.1f}x",
+            "yes" if result["identical"] else "NO",
+        ])
+    print_table(
+        ["rows", "serialize ms", "fast ms", "speedup", "end-to-end ms", "fast ms", "speedup", "identical"], rows,
+        note="serialize: response_model validation + json vs TypeAdapter.dump_json; end-to-end adds the query"
+    )
+
+
+if __name__ == "__main__":
+    main()
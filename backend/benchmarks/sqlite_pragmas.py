@@ -0,0 +1,118 @@
+"""SQLite PRAGMA 基准：读写混合负载下 SQLITE_PRAGMA_PROFILE=wal 与 off 的吞吐量与延迟
+
+用法: python -m benchmarks.sqlite_pragmas [--readers 40] [--writers 10] [--duration 5] [--records 10000]
+
+写客户端循环调用 create_record（学习记录插入加汇总表增量更新）；读客户端通过只读会话轮流执行
+学习记录日期范围查询（每页100条）与每日统计。统计每秒读写次数、失败数与p99延迟。
+"""
+import argparse
+import asyncio
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import emit, is_worker, percentile, prepare_database, print_table, run_variant
+
+VARIANTS = {
+    "wal": {"SQLITE_PRAGMA_PROFILE": "wal"},
+    "off": {"SQLITE_PRAGMA_PROFILE": "off"},
+}
+START = date(2020, 1, 1)
+
+
+async def worker(readers: int, writers: int, duration: float, records: int) -> dict:
+    import app.db.base  # noqa: F401  先注册全部模型
+    from sqlalchemy import insert
+
+    from app.crud.record import create_record, get_records_by_date_range
+    from app.crud.rollup import rebuild_daily_totals
+    from app.db.session import ReadSessionLocal, SessionLocal
+    from app.models.record import StudyRecord
+    from app.schemas.record import StudyRecordCreate
+    from app.services.stats import get_daily_stats
+
+    user_id, (task_id,) = await prepare_database()
+    days = max(1, records // 10)
+    async with SessionLocal() as db:
+        await db.execute(insert(StudyRecord), [
+            {"user_id": user_id, "task_id": task_id, "record_date": START + timedelta(days=index % days), "duration": 30}
+            for index in range(records)
+        ])
+        await rebuild_daily_totals(db, user_id)
+        await db.commit()
+
+    latencies = {"read": [], "write": []}
+    errors = {"read": 0, "write": 0}
+    deadline = time.perf_counter() + duration
+
+    async def read(index: int) -> None:
+        start_date = START + timedelta(days=index % days)
+        async with ReadSessionLocal() as db:
+            if index % 2:
+                await get_records_by_date_range(db, user_id, start_date, start_date + timedelta(days=30), limit=100)
+            else:
+                await get_daily_stats(db, user_id, start_date, start_date + timedelta(days=30))
+
+    async def write(index: int) -> None:
+        record_in = StudyRecordCreate(task_id=task_id, record_date=START + timedelta(days=index % days), duration=5)
+        async with SessionLocal() as db:
+            await create_record(db, record_in=record_in, user_id=user_id)
+
+    async def client(kind: str, operation, index: int) -> None:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                await operation(index)
+            except Exception:
+                errors[kind] += 1
+                continue
+            latencies[kind].append(time.perf_counter() - start)
+            index += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(client("read", read, index) for index in range(readers)),
+        *(client("write", write, index) for index in range(writers))
+    )
+    elapsed = time.perf_counter() - start
+
+    return {
+        kind: {
+            "per_second": len(latencies[kind]) / elapsed,
+            "errors": errors[kind],
+            "p50_ms": percentile(latencies[kind], 50) * 1000,
+            "p99_ms": percentile(latencies[kind], 99) * 1000,
+        }
+        for kind in ("read", "write")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.sqlite_pragmas", description=__doc__.split("\n")[0])
+    parser.add_argument("--readers", type=int, default=40, help="concurrent read clients")
+    parser.add_argument("--writers", type=int, default=10, help="concurrent write clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run each measurement")
+    parser.add_argument("--records", type=int, default=10000, help="study records seeded before the run")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if is_worker():
+        emit(asyncio.run(worker(args.readers, args.writers, args.duration, args.records)))
+        return
+
+    rows = []
+    for name, env in VARIANTS.items():
+        result = run_variant("benchmarks.sqlite_pragmas", env, [
+            "--readers", str(args.readers), "--writers", str(args.writers),
+            "--duration", str(args.duration), "--records", str(args.records)
+        ])
+        for kind in ("read", "write"):
+            stats = result[kind]
+            rows.append([
+                name, kind, f"{stats['per_second']:.0f}", stats["errors"],
+                f"{stats['p50_ms']:.1f}", f"{stats['p99_ms']:.1f}"
+            ])
+    print_table(["pragmas", "operation", "ops/s", "errors", "p50 ms", "p99 ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""总统计内存基准：不同学习记录数下 get_total_stats 的峰值内存
+
+用法: python -m benchmarks.total_stats_memory [--records 1000 10000 100000]
+
+以 tracemalloc 记录一次调用期间Python分配的峰值内存，并与改为汇总表聚合之前的做法
+（加载日期范围内全部 StudyRecord 实体后在Python中求和）对比，同时校验两者结果一致。
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from benchmarks.common import emit, is_worker, prepare_database, print_table, run_variant
+
+START = date(2020, 1, 1)
+# 每天的学习记录数，记录分布在 records / RECORDS_PER_DAY 天中
+RECORDS_PER_DAY = 4
+
+
+async def _load_all_records_total(db, user_id: int, start_date: date, end_date: date):
+    """对照组：加载全部学习记录后在Python中计算总时长与学习天数"""
+    from sqlalchemy import select
+
+    from app.models.record import StudyRecord
+
+    result = await db.execute(select(StudyRecord).where(
+        StudyRecord.user_id == user_id,
+        StudyRecord.record_date >= start_date,
+        StudyRecord.record_date <= end_date
+    ))
+    records = result.scalars().all()
+    total_minutes = sum(record.duration for record in records)
+    study_days = len(set(record.record_date for record in records))
+    return total_minutes, study_days
+
+
+async def _measure(fn) -> tuple:
+    """返回 (结果, 峰值内存字节数, 耗时秒数)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = await fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, elapsed
+
+
+async def worker(records: int) -> dict:
+    import app.db.base  # noqa: F401  先注册全部模型
+    from sqlalchemy import insert
+
+    from app.crud.rollup import rebuild_daily_totals
+    from app.db.session import SessionLocal
+    from app.models.record import StudyRecord
+    from app.services.stats import get_total_stats
+
+    user_id, (task_id,) = await prepare_database()
+    end = START + timedelta(days=records // RECORDS_PER_DAY)
+    async with SessionLocal() as db:
+        await db.execute(insert(StudyRecord), [
+            {
+                "user_id": user_id, "task_id": task_id,
+                "record_date": START + timedelta(days=index // RECORDS_PER_DAY), "duration": 1 + index % 90
+            }
+            for index in range(records)
+        ])
+        await rebuild_daily_totals(db, user_id)
+        await db.commit()
+
+    # 各自使用新会话，避免身份映射中残留的实体影响测量
+    async with SessionLocal() as db:
+        stats, rollup_peak, rollup_seconds = await _measure(lambda: get_total_stats(db, user_id, START, end))
+    async with SessionLocal() as db:
+        (total_minutes, study_days), load_peak, load_seconds = await _measure(
+            lambda: _load_all_records_total(db, user_id, START, end)
+        )
+
+    return {
+        "identical": (stats.total_minutes, stats.total_days) == (total_minutes, study_days),
+        "rollup_peak_kib": rollup_peak / 1024,
+        "rollup_ms": rollup_seconds * 1000,
+        "load_all_peak_kib": load_peak / 1024,
+        "load_all_ms": load_seconds * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.total_stats_memory", description=__doc__.split("\n")[0]
+    )
+    parser.add_argument("--records", nargs="+", type=int, default=[1000, 10000, 100000], help="study records")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if is_worker():
+        emit(asyncio.run(worker(args.records[0])))
+        return
+
+    rows = []
+    for records in args.records:
+        result = run_variant("benchmarks.total_stats_memory", {}, ["--records", str(records)])
+        rows.append([
+            records,
+            f"{result['rollup_peak_kib']:.0f}", f"{result['rollup_ms']:.1f}",
+            f"{result['load_all_peak_kib']:.0f}", f"{result['load_all_ms']:.1f}",
+            "yes" if result["identical"] else "NO",
+        ])
+    print_table(
+        ["records", "peak KiB", "ms", "load-all peak KiB", "load-all ms", "identical"], rows,
+        note="peak: Python allocations during one call (tracemalloc); load-all: previous ORM implementation"
+    )
+
+
+if __name__ == "__main__":
+    main()
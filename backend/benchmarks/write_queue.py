@@ -0,0 +1,94 @@
+"""写入队列基准：不同并发客户端数下，直接提交与写入队列合并提交的每秒写入数
+
+用法: python -m benchmarks.write_queue [--clients 50 100 200 500] [--duration 5]
+
+每个客户端循环调用 create_record（学习记录插入加两张汇总表的增量更新），
+统计时间窗口内成功提交的写操作数、失败数与单次写操作的延迟。
+"""
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from benchmarks.common import emit, is_worker, percentile, prepare_database, print_table, run_variant
+
+VARIANTS = {
+    "direct": {"DB_WRITE_QUEUE": "false"},
+    "queue": {"DB_WRITE_QUEUE": "true"},
+}
+
+
+async def worker(clients: int, duration: float) -> dict:
+    import app.db.base  # noqa: F401  先注册全部模型
+    from app.crud.record import create_record
+    from app.db.session import SessionLocal
+    from app.db.writer import lock_retry, write_queue
+    from app.core.config import settings
+    from app.schemas.record import StudyRecordCreate
+
+    user_id, (task_id,) = await prepare_database()
+    if settings.DB_WRITE_QUEUE:
+        write_queue.start()
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def client(index: int) -> None:
+        nonlocal errors
+        record_in = StudyRecordCreate(task_id=task_id, record_date=date(2024, 1, 1 + index % 28), duration=5)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                async with SessionLocal() as db:
+                    await create_record(db, record_in=record_in, user_id=user_id)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(index) for index in range(clients)))
+    elapsed = time.perf_counter() - start
+    queue_stats = write_queue.stats()
+    await write_queue.stop()
+
+    return {
+        "writes": len(latencies),
+        "writes_per_second": len(latencies) / elapsed,
+        "errors": errors,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "lock_retries": lock_retry.retries,
+        "average_batch": queue_stats["average_batch"],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.write_queue", description=__doc__.split("\n")[0])
+    parser.add_argument("--clients", nargs="+", type=int, default=[50, 100, 200, 500], help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run each measurement")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if is_worker():
+        emit(asyncio.run(worker(args.clients[0], args.duration)))
+        return
+
+    rows = []
+    for clients in args.clients:
+        for name, env in VARIANTS.items():
+            result = run_variant(
+                "benchmarks.write_queue", env, ["--clients", str(clients), "--duration", str(args.duration)]
+            )
+            rows.append([
+                clients, name, result["writes"], f"{result['writes_per_second']:.0f}", result["errors"],
+                f"{result['p50_ms']:.1f}", f"{result['p99_ms']:.1f}", result["lock_retries"], result["average_batch"]
+            ])
+    print_table(
+        ["clients", "mode", "writes", "writes/s", "errors", "p50 ms", "p99 ms", "lock retries", "avg batch"], rows
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.api.deps import get_current_principal
+from app.api.v1.auth import _registration_conflict
+from app.api.v1 import auth
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.user import User
+from app.schemas.user import Principal
+
+pytestmark = pytest.mark.anyio
+
+
+async def _duplicate_error(db, username: str, email: str) -> IntegrityError:
+    with pytest.raises(IntegrityError) as exc_info:
+        await db.execute(insert(User).values(username=username, email=email, password_hash="x"))
+    await db.rollback()
+    return exc_info.value
+
+
+@pytest.mark.parametrize("username, email, detail", [
+    ("alice", "other@example.com", "Username already registered"),
+    ("bob", "alice@example.com", "Email already registered"),
+    ("bob", "Alice@Example.com", "Email already registered"),
+])
+async def test_duplicate_registration_detail(db, user_id, username, email, detail):
+    assert _registration_conflict(await _duplicate_error(db, username, email)) == detail
+
+
+async def test_username_containing_email_is_username_conflict(db):
+    await db.execute(insert(User).values(username="myemail", email="a@example.com", password_hash="x"))
+    await db.commit()
+    assert _registration_conflict(await _duplicate_error(db, "myemail", "b@example.com")) == "Username already registered"
+
+
+class _UniqueViolation(Exception):
+    """模拟 asyncpg 的 UniqueViolationError"""
+
+    def __init__(self, constraint_name: str):
+        super().__init__("duplicate key value violates unique constraint")
+        self.constraint_name = constraint_name
+
+
+@pytest.mark.parametrize("constraint_name, detail", [
+    ("ix_users_username", "Username already registered"),
+    ("ix_users_email", "Email already registered"),
+    ("ix_users_email_lower", "Email already registered"),
+])
+def test_postgresql_constraint_name(constraint_name, detail):
+    # PostgreSQL 的错误详情包含取值，例如 Key (username)=(myemail)，只能按约束名称判断
+    orig = Exception("Key (username)=(myemail) already exists.")
+    orig.__cause__ = _UniqueViolation(constraint_name)
+    assert _registration_conflict(IntegrityError("INSERT", {}, orig)) == detail
+
+
+async def test_principal_from_token_with_uid_skips_database(engine, db, user_id):
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        token = create_access_token({"sub": "alice", "uid": user_id})
+        assert await get_current_principal(db, token) == Principal(id=user_id, username="alice")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", listener)
+    assert statements == []
+
+
+async def test_principal_from_legacy_token_looks_up_user_id(db, user_id):
+    token = create_access_token({"sub": "alice"})
+    assert await get_current_principal(db, token) == Principal(id=user_id, username="alice")
+
+
+@pytest.mark.parametrize("claims", [{"sub": "nobody"}, {"uid": 1}])
+async def test_principal_rejects_unknown_user_or_missing_subject(db, user_id, claims):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_principal(db, create_access_token(claims))
+    assert exc_info.value.status_code == 401
+
+
+async def test_principal_rejects_invalid_token(db):
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_principal(db, "not-a-jwt")
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.parametrize("new_hash", [None, "rehashed"])
+async def test_login_releases_connection_before_hashing(client, db, monkeypatch, new_hash):
+    in_transaction = []
+
+    async def verify(password, password_hash):
+        in_transaction.append(db.in_transaction())
+        return password_hash == "x", new_hash
+
+    monkeypatch.setattr(auth, "verify_and_rehash_password_async", verify)
+    response = await client.post(f"{settings.API_V1_STR}/auth/login", data={"username": "alice", "password": "secret"})
+    assert response.status_code == 200
+    assert in_transaction == [False]
+    stored = (await db.execute(select(User.password_hash).where(User.username == "alice"))).scalar()
+    assert stored == (new_hash or "x")
+
+
+async def test_login_rejects_unknown_user(client, monkeypatch):
+    async def verify(password, password_hash):
+        raise AssertionError("unknown users are not hashed")
+
+    monkeypatch.setattr(auth, "verify_and_rehash_password_async", verify)
+    response = await client.post(f"{settings.API_V1_STR}/auth/login", data={"username": "nobody", "password": "secret"})
+    assert response.status_code == 401
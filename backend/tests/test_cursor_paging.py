@@ -0,0 +1,95 @@
+import pytest
+from datetime import date, datetime
+from sqlalchemy import insert, literal_column
+
+from app.core.config import settings
+from app.models.record import StudyRecord
+from app.models.task import Task
+from app.utils.cursor import NEXT_CURSOR_HEADER
+
+pytestmark = pytest.mark.anyio
+
+TASKS_URL = f"{settings.API_V1_STR}/tasks/"
+RECORDS_URL = f"{settings.API_V1_STR}/records/"
+
+
+async def _pages(client, url: str, limit: int, **params):
+    """按游标逐页读取直到不再返回游标，返回各页的ID列表"""
+    pages, cursor = [], None
+    # 游标不前进时翻页不会结束，页数超过数据量即视为失败
+    for _ in range(20):
+        response = await client.get(url, params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+    pytest.fail("cursor paging did not terminate")
+
+
+@pytest.fixture
+async def tied_tasks(db, user_id):
+    """多个创建时间相同（或同一秒内）的任务"""
+    created = datetime(2024, 1, 1, 8, 0, 0)
+    rows = [
+        {"created_at": created}, {"created_at": created}, {"created_at": created},
+        {"created_at": datetime(2024, 1, 1, 8, 0, 0, 500000)},
+        {"created_at": datetime(2024, 1, 1, 9, 0, 0)},
+    ]
+    if db.get_bind().dialect.name == "sqlite":
+        # CURRENT_TIMESTAMP 写入的值不带微秒，与经SQLAlchemy写入的值格式不同
+        rows.append({"created_at": literal_column("'2024-01-01 08:00:00'")})
+    for row in rows:
+        await db.execute(insert(Task).values(user_id=user_id, title="task", priority=1, **row))
+    await db.commit()
+    return len(rows)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3])
+async def test_task_pages_with_tied_created_at(client, tied_tasks, limit):
+    full = [task["id"] for task in (await client.get(TASKS_URL, params={"limit": 1000})).json()]
+    assert len(full) == tied_tasks
+
+    pages = await _pages(client, TASKS_URL, limit)
+    seen = [task_id for page in pages for task_id in page]
+    # 没有遗漏或重复，顺序与一次取回全部一致
+    assert seen == full
+    assert all(len(page) == limit for page in pages[:-1])
+
+
+@pytest.fixture
+async def tied_records(db, user_id):
+    """多条日期相同的学习记录"""
+    task_id = (await db.execute(
+        insert(Task).values(user_id=user_id, title="math", priority=1).returning(Task.id)
+    )).scalar()
+    await db.execute(insert(StudyRecord), [
+        {"user_id": user_id, "task_id": task_id, "record_date": record_date, "duration": 10}
+        for record_date in [date(2024, 1, 1)] * 4 + [date(2024, 1, 2)]
+    ])
+    await db.commit()
+    return 5
+
+
+@pytest.mark.parametrize("params", [{}, {"start": "2024-01-01", "end": "2024-01-31"}])
+async def test_record_pages_with_tied_dates(client, tied_records, params):
+    full = [record["id"] for record in (await client.get(RECORDS_URL, params={**params, "limit": 1000})).json()]
+    assert len(full) == tied_records
+
+    pages = await _pages(client, RECORDS_URL, 2, **params)
+    assert [record_id for page in pages for record_id in page] == full
+    assert [len(page) for page in pages] == [2, 2, 1]
+
+
+async def test_exactly_full_last_page_is_followed_by_empty_page(client, tied_records):
+    pages = await _pages(client, RECORDS_URL, 5)
+    # 最后一页恰好满页时仍返回游标，下一页为空且不再返回游标
+    assert [len(page) for page in pages] == [5, 0]
+
+
+@pytest.mark.parametrize("url", [TASKS_URL, RECORDS_URL])
+@pytest.mark.parametrize("cursor", ["garbage", "bm90LWpzb24", "WyJub3QtYS1kYXRlIiwgMV0"])
+async def test_malformed_cursor_is_rejected(client, url, cursor):
+    response = await client.get(url, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
@@ -0,0 +1,116 @@
+import sqlite3
+
+import httpx
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.api.deps import get_current_principal
+from app.core.config import settings
+from app.db.session import get_db
+from app.db.writer import _LockRetry, lock_retry
+from app.main import app
+from app.schemas.user import Principal
+
+pytestmark = pytest.mark.anyio
+
+
+def locked_error() -> OperationalError:
+    return OperationalError("COMMIT", {}, sqlite3.OperationalError("database is locked"))
+
+
+def failing(times: int):
+    """前 times 次调用抛出数据库被锁错误，之后返回 "ok" """
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        if calls <= times:
+            raise locked_error()
+        return "ok"
+    return attempt
+
+
+async def test_retries_until_lock_is_released():
+    retry = _LockRetry(deadline=1, base_delay=0.001, max_delay=0.005)
+    assert await retry.run(failing(2)) == "ok"
+    assert (retry.retries, retry.recovered, retry.give_ups) == (2, 1, 0)
+
+
+async def test_gives_up_after_deadline():
+    retry = _LockRetry(deadline=0.02, base_delay=0.005, max_delay=0.005)
+    with pytest.raises(OperationalError):
+        await retry.run(failing(1000))
+    assert retry.give_ups == 1 and retry.recovered == 0 and retry.retries > 0
+
+
+async def test_other_errors_are_not_retried():
+    retry = _LockRetry(deadline=1, base_delay=0.001, max_delay=0.005)
+
+    async def attempt():
+        raise OperationalError("SELECT", {}, sqlite3.OperationalError("no such table: tasks"))
+
+    with pytest.raises(OperationalError):
+        await retry.run(attempt)
+    assert (retry.retries, retry.give_ups) == (0, 0)
+
+
+@pytest.fixture
+async def locked_client(db, user_id, monkeypatch):
+    """提交时先遇到若干次数据库被锁的客户端；lock_retry 使用很短的截止时间"""
+    monkeypatch.setattr(settings, "DB_WRITE_QUEUE", False)
+    monkeypatch.setattr(lock_retry, "deadline", 0.05)
+    monkeypatch.setattr(lock_retry, "base_delay", 0.001)
+    monkeypatch.setattr(lock_retry, "max_delay", 0.005)
+
+    commit = db.commit
+    locked_commits = {"remaining": 0}
+
+    async def flaky_commit():
+        if locked_commits["remaining"] > 0:
+            locked_commits["remaining"] -= 1
+            raise locked_error()
+        await commit()
+
+    monkeypatch.setattr(db, "commit", flaky_commit)
+
+    async def write_db():
+        yield db
+
+    app.dependency_overrides[get_db] = write_db
+    app.dependency_overrides[get_current_principal] = lambda: Principal(id=user_id, username="alice")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client, locked_commits
+    app.dependency_overrides.clear()
+
+
+async def _lock_metrics(client) -> dict:
+    return (await client.get("/metrics")).json()["db_lock_retry"]
+
+
+async def test_request_succeeds_after_retry(locked_client):
+    client, locked_commits = locked_client
+    before = await _lock_metrics(client)
+    locked_commits["remaining"] = 2
+
+    response = await client.post(f"{settings.API_V1_STR}/tasks/", json={"title": "math", "priority": 1})
+    assert response.status_code == 201
+
+    after = await _lock_metrics(client)
+    assert after["retries"] - before["retries"] == 2
+    assert after["recovered"] - before["recovered"] == 1
+    assert after["give_ups"] == before["give_ups"]
+
+
+async def test_request_gives_up_with_503(locked_client):
+    client, locked_commits = locked_client
+    before = await _lock_metrics(client)
+    locked_commits["remaining"] = 1000
+
+    response = await client.post(f"{settings.API_V1_STR}/tasks/", json={"title": "math", "priority": 1})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    after = await _lock_metrics(client)
+    assert after["give_ups"] - before["give_ups"] == 1
+    assert after["retries"] > before["retries"]
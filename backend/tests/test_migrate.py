@@ -0,0 +1,109 @@
+import pytest
+from datetime import date
+from sqlalchemy import func, inspect, insert, select
+
+import app.main
+from app.core.config import settings
+from app.db.base import Base
+from app.db.migrate import LATEST_VERSION, MIGRATIONS, get_schema_version, schema_version, upgrade
+from app.models.record import StudyRecord
+from app.models.rollup import TaskDailyTotal, UserDailyTotal
+from app.models.task import Task
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def baseline(empty_engine):
+    """迁移机制引入之前的数据库：只有用户、任务、学习记录三张表及其数据，没有 schema_version 表"""
+    tables = [Base.metadata.tables[name] for name in ("users", "tasks", "study_records")]
+    async with empty_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
+        user_id = (await conn.execute(
+            insert(User).values(username="alice", email="alice@example.com", password_hash="x").returning(User.id)
+        )).scalar()
+        math, physics = (await conn.execute(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True),
+            [{"user_id": user_id, "title": "math", "priority": 1}, {"user_id": user_id, "title": "physics", "priority": 1}]
+        )).scalars().all()
+        await conn.execute(insert(StudyRecord), [
+            {"user_id": user_id, "task_id": math, "record_date": date(2024, 1, 1), "duration": 30},
+            {"user_id": user_id, "task_id": math, "record_date": date(2024, 1, 1), "duration": 20},
+            {"user_id": user_id, "task_id": physics, "record_date": date(2024, 1, 1), "duration": 15},
+            {"user_id": user_id, "task_id": physics, "record_date": date(2024, 1, 3), "duration": 45},
+        ])
+    return empty_engine, user_id, math, physics
+
+
+async def test_fresh_database_has_version_zero(empty_engine):
+    assert await get_schema_version(empty_engine) == 0
+
+
+async def test_upgrade_baseline_database(baseline):
+    engine, user_id, math, physics = baseline
+    applied = await upgrade(engine)
+
+    assert [migration.version for migration in applied] == [migration.version for migration in MIGRATIONS]
+    assert await get_schema_version(engine) == LATEST_VERSION
+
+    async with engine.connect() as conn:
+        # 汇总表根据已有学习记录回填
+        daily = (await conn.execute(
+            select(UserDailyTotal.user_id, UserDailyTotal.day, UserDailyTotal.minutes, UserDailyTotal.record_count)
+            .order_by(UserDailyTotal.day)
+        )).all()
+        assert daily == [(user_id, date(2024, 1, 1), 65, 3), (user_id, date(2024, 1, 3), 45, 1)]
+        task_daily = (await conn.execute(
+            select(TaskDailyTotal.task_id, TaskDailyTotal.day, TaskDailyTotal.minutes)
+            .order_by(TaskDailyTotal.day, TaskDailyTotal.task_id)
+        )).all()
+        assert task_daily == [(math, date(2024, 1, 1), 50), (physics, date(2024, 1, 1), 15), (physics, date(2024, 1, 3), 45)]
+
+        # 迁移创建的表与索引
+        tables = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_table_names())
+        assert {"user_daily_totals", "task_daily_totals", "refresh_tokens", "schema_version"} <= set(tables)
+        indexes = await conn.run_sync(
+            lambda sync_conn: {index["name"] for index in inspect(sync_conn).get_indexes("study_records")}
+        )
+        assert {"ix_study_records_user_date", "ix_study_records_user_task_date", "ix_study_records_task"} <= indexes
+
+
+async def test_upgrade_again_is_a_no_op(baseline):
+    engine = baseline[0]
+    await upgrade(engine)
+
+    assert await upgrade(engine) == []
+    assert await get_schema_version(engine) == LATEST_VERSION
+    async with engine.connect() as conn:
+        assert (await conn.execute(select(func.count()).select_from(schema_version))).scalar() == len(MIGRATIONS)
+        assert (await conn.execute(select(func.sum(UserDailyTotal.minutes)))).scalar() == 110
+
+
+async def test_upgrade_to_target_version(empty_engine):
+    applied = await upgrade(empty_engine, target=2)
+    assert [migration.version for migration in applied] == [1, 2]
+    assert await get_schema_version(empty_engine) == 2
+
+    applied = await upgrade(empty_engine)
+    assert applied[0].version == 3
+    assert await get_schema_version(empty_engine) == LATEST_VERSION
+
+
+async def test_startup_refuses_outdated_schema(empty_engine, monkeypatch):
+    monkeypatch.setattr(app.main, "engine", empty_engine)
+    monkeypatch.setattr(settings, "DB_AUTO_MIGRATE", False)
+
+    with pytest.raises(RuntimeError, match=f"behind {LATEST_VERSION}"):
+        await app.main.init_db()
+    # 拒绝启动时不修改数据库
+    assert await get_schema_version(empty_engine) == 0
+
+
+async def test_startup_migrates_outdated_schema(empty_engine, monkeypatch):
+    monkeypatch.setattr(app.main, "engine", empty_engine)
+    monkeypatch.setattr(settings, "DB_AUTO_MIGRATE", True)
+    monkeypatch.setattr(settings, "DB_WRITE_QUEUE", False)
+
+    await app.main.init_db()
+    assert await get_schema_version(empty_engine) == LATEST_VERSION
@@ -0,0 +1,99 @@
+from datetime import date
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from sqlalchemy import event, select, text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_principal
+from app.api.v1 import task
+from app.db.query_guard import (
+    QueryCountGuard, QueryLimitExceeded, _count_query, install_query_guard, start_query_budget
+)
+from app.db.session import get_db, get_read_db
+from app.models.record import StudyRecord
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.user import Principal
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def guarded_client(engine, db, user_id):
+    """开启查询计数（上限3条）的应用，包含任务接口与一个执行指定条数语句的接口"""
+    install_query_guard(engine)
+    guarded = FastAPI()
+    guarded.add_middleware(QueryCountGuard, limit=3)
+    guarded.include_router(task.router, prefix="/tasks")
+
+    @guarded.get("/queries/{count}")
+    async def run_queries(count: int, session: AsyncSession = Depends(get_db)):
+        for _ in range(count):
+            await session.execute(text("SELECT 1"))
+        return {"count": count}
+
+    async def test_db():
+        yield db
+
+    guarded.dependency_overrides[get_db] = test_db
+    guarded.dependency_overrides[get_read_db] = test_db
+    guarded.dependency_overrides[get_current_principal] = lambda: Principal(id=user_id, username="alice")
+    # 让应用内的异常以500响应返回，而不是在测试中直接抛出
+    transport = httpx.ASGITransport(app=guarded, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    event.remove(engine.sync_engine, "before_cursor_execute", _count_query)
+
+
+async def test_request_within_limit_reports_query_count(guarded_client):
+    response = await guarded_client.get("/queries/3")
+    assert response.status_code == 200
+    assert response.headers["X-Query-Count"] == "3"
+
+    response = await guarded_client.get("/tasks/")
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) <= 3
+
+
+async def test_request_over_limit_fails(guarded_client):
+    response = await guarded_client.get("/queries/4")
+    assert response.status_code == 500
+
+
+async def test_limit_error_names_statement(engine):
+    install_query_guard(engine)
+    try:
+        budget = start_query_budget(1)
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            with pytest.raises(QueryLimitExceeded, match="SELECT 2"):
+                await conn.execute(text("SELECT 2"))
+        assert budget.count == 2
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count_query)
+
+
+@pytest.fixture
+async def task_with_record(db, user_id):
+    """一个带学习记录的任务"""
+    result = await db.execute(
+        Task.__table__.insert().values(user_id=user_id, title="math", priority=1).returning(Task.id)
+    )
+    await db.execute(StudyRecord.__table__.insert().values(
+        user_id=user_id, task_id=result.scalar(), record_date=date(2024, 1, 1), duration=10
+    ))
+    await db.commit()
+
+
+@pytest.mark.parametrize("model, relationship", [
+    (Task, "study_records"), (Task, "user"), (StudyRecord, "task"), (StudyRecord, "user"), (User, "tasks"),
+])
+async def test_unloaded_relationship_raises(db, task_with_record, model, relationship):
+    db.expunge_all()
+    obj = (await db.execute(select(model).limit(1))).scalar_one()
+    # lazy="raise" 使隐式懒加载立即报错，而不是发出额外的查询
+    with pytest.raises(InvalidRequestError, match="lazy='raise'"):
+        getattr(obj, relationship)
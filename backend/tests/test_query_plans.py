@@ -0,0 +1,164 @@
+"""对每条CRUD与统计查询查看执行计划（SQLite 的 EXPLAIN QUERY PLAN、PostgreSQL 的 EXPLAIN），出现全表扫描即失败
+
+按设计需要读取全表的语句不在此检查范围内：不指定用户的汇总表重建（rebuild-rollups）。
+"""
+import re
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.core.security import hash_token
+from app.crud import record as record_crud, refresh_token as refresh_token_crud, rollup as rollup_crud
+from app.crud import task as task_crud, user as user_crud
+from app.db.base import Base
+from app.schemas.record import StudyRecordCreate, StudyRecordUpdate
+from app.schemas.task import TaskCreate, TaskUpdate
+from app.services import record as record_service, stats as stats_service
+
+pytestmark = pytest.mark.anyio
+
+START, END = date(2024, 1, 1), date(2024, 1, 31)
+# 执行计划中对模型表的全表扫描（包括按索引顺序扫描整个表），CTE等临时结果的扫描不算
+FULL_SCAN = re.compile(r"\bSCAN (?:TABLE )?(\w+)")
+POSTGRESQL_FULL_SCAN = re.compile(r"\bSeq Scan on (\w+)")
+
+
+@pytest.fixture
+async def seed(db, user_id):
+    """一个用户的两个任务与三条学习记录"""
+    math = await task_crud.create_task(db, TaskCreate(title="math", priority=2), user_id)
+    physics = await task_crud.create_task(db, TaskCreate(title="physics", priority=1), user_id)
+    records = [
+        await record_crud.create_record(
+            db, StudyRecordCreate(task_id=task.id, record_date=START + timedelta(days=day), duration=30), user_id
+        )
+        for task, day in ((math, 0), (math, 1), (physics, 1))
+    ]
+    await refresh_token_crud.create_refresh_token(db, user_id, hash_token("token"), datetime.utcnow() + timedelta(days=1))
+    await db.commit()
+    return SimpleNamespace(user_id=user_id, math=math, physics=physics, records=records)
+
+
+async def _stream(db, s, **kwargs):
+    return [row async for row in record_crud.stream_records_by_date_range(db, s.user_id, START, END, **kwargs)]
+
+
+EXPAND = record_crud.record_list_columns(expand_task=True)
+CURSOR = (START, 1)
+
+OPERATIONS = {
+    # 学习记录
+    "get_record": lambda db, s: record_crud.get_record(db, s.records[0].id, s.user_id),
+    "get_records": lambda db, s: record_crud.get_records(db, s.user_id, skip=1),
+    "get_records_cursor": lambda db, s: record_crud.get_records(db, s.user_id, after=CURSOR),
+    "get_records_fields": lambda db, s: record_crud.get_records(
+        db, s.user_id, columns=record_crud.record_list_columns(["duration"])
+    ),
+    "get_records_expand_task": lambda db, s: record_crud.get_records(db, s.user_id, columns=EXPAND),
+    "get_records_expand_task_cursor": lambda db, s: record_crud.get_records(db, s.user_id, after=CURSOR, columns=EXPAND),
+    "get_records_with_task": lambda db, s: record_crud.get_records_with_task(db, s.user_id),
+    "get_records_by_date_range": lambda db, s: record_crud.get_records_by_date_range(db, s.user_id, START, END),
+    "get_records_by_date_range_cursor": lambda db, s: record_crud.get_records_by_date_range(
+        db, s.user_id, START, END, limit=2, after=CURSOR
+    ),
+    "get_records_by_date_range_expand_task": lambda db, s: record_crud.get_records_by_date_range(
+        db, s.user_id, START, END, limit=2, after=CURSOR, columns=EXPAND
+    ),
+    "stream_records_by_date_range": lambda db, s: _stream(db, s),
+    "stream_records_by_date_range_expand_task": lambda db, s: _stream(db, s, columns=EXPAND),
+    "get_daily_total": lambda db, s: record_crud.get_daily_total(db, s.user_id, START),
+    "create_record": lambda db, s: record_service.create_record(
+        db, StudyRecordCreate(task_id=s.math.id, record_date=END, duration=10), s.user_id
+    ),
+    "bulk_create_records": lambda db, s: record_service.bulk_create_records(db, [
+        {"task_id": s.math.id, "record_date": str(END), "duration": 10},
+        {"task_id": s.physics.id, "record_date": str(END), "duration": 20},
+    ], s.user_id),
+    "update_record": lambda db, s: record_service.update_record(
+        db, s.records[0].id, StudyRecordUpdate(task_id=s.physics.id, duration=45), s.user_id
+    ),
+    "delete_record": lambda db, s: record_crud.delete_record(db, s.records[0].id, s.user_id),
+    "get_user_records_in_date_range": lambda db, s: record_service.get_user_records_in_date_range(
+        db, s.user_id, START, END
+    ),
+    "get_total_minutes_by_task": lambda db, s: record_service.get_total_minutes_by_task(
+        db, s.user_id, s.math.id, START, END
+    ),
+    # 任务
+    "get_task": lambda db, s: task_crud.get_task(db, s.math.id, s.user_id),
+    "get_tasks": lambda db, s: task_crud.get_tasks(db, s.user_id, skip=1),
+    "get_tasks_cursor": lambda db, s: task_crud.get_tasks(db, s.user_id, after=(datetime(2024, 1, 1), 1)),
+    "get_tasks_fields": lambda db, s: task_crud.get_tasks(db, s.user_id, columns=task_crud.task_list_columns(["title"])),
+    "get_tasks_with_record_count": lambda db, s: task_crud.get_tasks_with_record_count(db, s.user_id),
+    "create_task": lambda db, s: task_crud.create_task(db, TaskCreate(title="chemistry", priority=3), s.user_id),
+    "update_task": lambda db, s: task_crud.update_task(db, s.math.id, TaskUpdate(status=1), s.user_id),
+    "delete_task": lambda db, s: task_crud.delete_task(db, s.math.id, s.user_id),
+    # 统计
+    "get_daily_stats": lambda db, s: stats_service.get_daily_stats(db, s.user_id, START, END),
+    "get_task_stats": lambda db, s: stats_service.get_task_stats(db, s.user_id, START, END),
+    "get_total_stats": lambda db, s: stats_service.get_total_stats(db, s.user_id, START, END),
+    "get_combined_stats": lambda db, s: stats_service.get_combined_stats(db, s.user_id, START, END),
+    "rebuild_user_rollups": lambda db, s: _rebuild_user_rollups(db, s.user_id),
+    # 用户与刷新令牌
+    "get_user_by_username": lambda db, s: user_crud.get_user_by_username(db, "alice"),
+    "get_user_by_email": lambda db, s: user_crud.get_user_by_email(db, "Alice@Example.com"),
+    "get_user_by_id": lambda db, s: user_crud.get_user_by_id(db, s.user_id),
+    "update_user_password_hash": lambda db, s: user_crud.update_user_password_hash(db, s.user_id, "y"),
+    "get_refresh_token": lambda db, s: refresh_token_crud.get_refresh_token(db, hash_token("token")),
+    "revoke_user_refresh_tokens": lambda db, s: refresh_token_crud.revoke_user_refresh_tokens(db, s.user_id),
+}
+
+
+async def _rebuild_user_rollups(db, user_id):
+    await rollup_crud.rebuild_daily_totals(db, user_id)
+    await rollup_crud.rebuild_task_totals(db, user_id)
+
+
+async def _explain(conn, statement, parameters):
+    """返回语句的执行计划各行与匹配全表扫描的正则"""
+    if conn.dialect.name == "postgresql":
+        result = await conn.exec_driver_sql(f"EXPLAIN {statement}", tuple(parameters or ()))
+        return [row[0] for row in result.all()], POSTGRESQL_FULL_SCAN
+    result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", tuple(parameters or ()))
+    return [row[3] for row in result.all()], FULL_SCAN
+
+
+@pytest.mark.parametrize("name", OPERATIONS)
+async def test_no_full_table_scan(engine, db, seed, name):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        # executemany 时只取第一组参数生成执行计划
+        if executemany and parameters and isinstance(parameters[0], (tuple, list)):
+            parameters = parameters[0]
+        statements.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        await OPERATIONS[name](db, seed)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    statements = [
+        (statement, parameters) for statement, parameters in statements
+        if statement.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE"))
+    ]
+    assert statements, f"{name} executed no statements"
+
+    full_scans = []
+    async with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            # 测试数据量很小，规划器总会选择顺序扫描；禁用后仍出现的顺序扫描说明没有可用的索引
+            await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for statement, parameters in statements:
+            plan, pattern = await _explain(conn, statement, parameters)
+            scanned = [
+                match.group(1) for detail in plan for match in pattern.finditer(detail)
+                if match.group(1) in Base.metadata.tables
+            ]
+            if scanned:
+                full_scans.append(f"{statement}\n    {plan}")
+
+    assert not full_scans, "full table scan:\n" + "\n".join(full_scans)
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.config import settings
+from app.crud.task import create_task
+from app.schemas.record import StudyRecordCreate
+from app.schemas.task import TaskCreate
+from app.services.record import create_record
+
+pytestmark = pytest.mark.anyio
+
+URL = f"{settings.API_V1_STR}/records/"
+RANGE = {"start": "2024-01-01", "end": "2024-01-31"}
+
+
+@pytest.fixture
+async def records(db, user_id):
+    task = await create_task(db, TaskCreate(title="math", priority=1), user_id)
+    for day in range(3):
+        await create_record(
+            db, StudyRecordCreate(task_id=task.id, record_date=date(2024, 1, 1) + timedelta(days=day), duration=10),
+            user_id
+        )
+
+
+async def test_range_query_honours_client_limit(client, records):
+    response = await client.get(URL, params={**RANGE, "limit": 2})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert response.headers.get("X-Next-Cursor")
+
+
+async def test_range_query_limit_is_capped(client, records, monkeypatch):
+    monkeypatch.setattr(settings, "RECORDS_RANGE_MAX_ROWS", 1)
+    response = await client.get(URL, params={**RANGE, "limit": 100})
+    assert len(response.json()) == 1
+    assert response.headers.get("X-Next-Cursor")
+
+
+@pytest.mark.parametrize("params", [{}, {"start": "2024-01-01"}, {"end": "2024-01-31"}])
+async def test_stream_requires_both_dates(client, params):
+    response = await client.get(URL, params={**params, "stream": "true"})
+    assert response.status_code == 400
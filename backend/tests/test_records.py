@@ -0,0 +1,56 @@
+import pytest
+from datetime import date
+from sqlalchemy import insert
+
+from app.crud.record import create_record as crud_create_record, get_records, get_records_with_task, record_list_columns
+from app.crud.task import create_task
+from app.models.user import User
+from app.schemas.record import StudyRecordCreate, StudyRecordUpdate
+from app.schemas.task import TaskCreate
+from app.services.record import create_record, update_record
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def other_user_id(db):
+    result = await db.execute(
+        insert(User).values(username="bob", email="bob@example.com", password_hash="x").returning(User.id)
+    )
+    await db.commit()
+    return result.scalar()
+
+
+async def test_expand_task_joins_own_task(db, user_id):
+    task = await create_task(db, TaskCreate(title="math", priority=3), user_id)
+    await create_record(db, StudyRecordCreate(task_id=task.id, record_date=date(2024, 1, 1), duration=30), user_id)
+    
+    rows = await get_records(db, user_id=user_id, columns=record_list_columns(["task_title", "task_priority"], True))
+    assert [row._asdict() for row in rows] == [
+        {"record_date": date(2024, 1, 1), "id": rows[0].id, "task_title": "math", "task_priority": 3}
+    ]
+
+
+async def test_expand_task_hides_other_users_task(db, user_id, other_user_id):
+    task = await create_task(db, TaskCreate(title="alice secret project", priority=3), user_id)
+    # 绕过服务层的归属检查，模拟已存在的跨用户记录
+    await crud_create_record(db, StudyRecordCreate(task_id=task.id, record_date=date(2024, 1, 1), duration=30), other_user_id)
+    
+    rows = await get_records(db, user_id=other_user_id, columns=record_list_columns(expand_task=True))
+    assert len(rows) == 1 and rows[0].task_title is None and rows[0].task_priority is None
+    records = await get_records_with_task(db, user_id=other_user_id)
+    assert len(records) == 1 and records[0].task is None
+
+
+async def test_create_and_update_require_own_task(db, user_id, other_user_id):
+    alice_task = await create_task(db, TaskCreate(title="alice", priority=1), user_id)
+    bob_task = await create_task(db, TaskCreate(title="bob", priority=1), other_user_id)
+    
+    with pytest.raises(ValueError):
+        await create_record(db, StudyRecordCreate(task_id=alice_task.id, record_date=date(2024, 1, 1), duration=30), other_user_id)
+    
+    record = await create_record(db, StudyRecordCreate(task_id=bob_task.id, record_date=date(2024, 1, 1), duration=30), other_user_id)
+    with pytest.raises(ValueError):
+        await update_record(db, record.id, StudyRecordUpdate(task_id=alice_task.id), other_user_id)
+    updated = await update_record(db, record.id, StudyRecordUpdate(duration=45), other_user_id)
+    assert updated.task_id == bob_task.id and updated.duration == 45
@@ -0,0 +1,27 @@
+import pytest
+
+from app.services.auth import issue_tokens, rotate_refresh_token, revoke_token
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_rotation_invalidates_old_token(db, user_id):
+    first = await issue_tokens(db, user_id, "alice")
+    second = await rotate_refresh_token(db, first.refresh_token)
+    assert second is not None and second.refresh_token != first.refresh_token
+    assert await rotate_refresh_token(db, second.refresh_token) is not None
+
+
+async def test_reuse_revokes_all_tokens(db, user_id):
+    first = await issue_tokens(db, user_id, "alice")
+    second = await rotate_refresh_token(db, first.refresh_token)
+    
+    assert await rotate_refresh_token(db, first.refresh_token) is None
+    # 重复使用被识别为泄露，较新的令牌也已吊销
+    assert await rotate_refresh_token(db, second.refresh_token) is None
+
+
+async def test_revoked_token_cannot_refresh(db, user_id):
+    token = await issue_tokens(db, user_id, "alice")
+    await revoke_token(db, token.refresh_token)
+    assert await rotate_refresh_token(db, token.refresh_token) is None
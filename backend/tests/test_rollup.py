@@ -0,0 +1,67 @@
+import pytest
+from datetime import date
+from sqlalchemy import select
+
+from app.crud.record import create_record, update_record, delete_record
+from app.crud.task import create_task, delete_task
+from app.models.record import StudyRecord
+from app.models.rollup import TaskDailyTotal, UserDailyTotal
+from app.schemas.record import StudyRecordCreate, StudyRecordUpdate
+from app.schemas.task import TaskCreate
+
+pytestmark = pytest.mark.anyio
+
+
+async def _task_totals(db):
+    result = await db.execute(select(TaskDailyTotal.task_id, TaskDailyTotal.minutes))
+    return sorted(result.all())
+
+
+async def _daily_totals(db):
+    result = await db.execute(select(UserDailyTotal.day, UserDailyTotal.minutes, UserDailyTotal.record_count))
+    return sorted(result.all())
+
+
+async def test_delete_task_with_records(db, user_id):
+    math = await create_task(db, TaskCreate(title="math", priority=1), user_id)
+    physics = await create_task(db, TaskCreate(title="physics", priority=1), user_id)
+    for task, day, duration in [(math, 1, 30), (math, 1, 15), (math, 2, 20), (physics, 1, 40)]:
+        await create_record(db, StudyRecordCreate(task_id=task.id, record_date=date(2024, 1, day), duration=duration), user_id)
+    
+    assert await delete_task(db, math.id, user_id)
+    # 任务的学习记录一并删除，并从每日汇总中移出，其他任务不受影响
+    records = await db.execute(select(StudyRecord.task_id, StudyRecord.duration))
+    assert records.all() == [(physics.id, 40)]
+    assert await _daily_totals(db) == [(date(2024, 1, 1), 40, 1), (date(2024, 1, 2), 0, 0)]
+    assert await _task_totals(db) == [(physics.id, 40)]
+
+
+async def test_delete_task_after_its_records_are_deleted(db, user_id):
+    task = await create_task(db, TaskCreate(title="math", priority=1), user_id)
+    record = await create_record(db, StudyRecordCreate(task_id=task.id, record_date=date(2024, 1, 1), duration=30), user_id)
+    assert await delete_record(db, record.id, user_id)
+    # 汇总行分钟数降为0但仍引用该任务
+    assert await _task_totals(db) == [(task.id, 0)]
+    
+    assert await delete_task(db, task.id, user_id)
+    assert await _task_totals(db) == []
+
+
+async def test_delete_task_after_its_records_move_to_another_task(db, user_id):
+    old = await create_task(db, TaskCreate(title="old", priority=1), user_id)
+    new = await create_task(db, TaskCreate(title="new", priority=1), user_id)
+    record = await create_record(db, StudyRecordCreate(task_id=old.id, record_date=date(2024, 1, 1), duration=30), user_id)
+    await update_record(db, record.id, StudyRecordUpdate(task_id=new.id), user_id)
+    
+    assert await delete_task(db, old.id, user_id)
+    assert await _task_totals(db) == [(new.id, 30)]
+
+
+async def test_delete_other_users_task_keeps_totals(db, user_id):
+    task = await create_task(db, TaskCreate(title="math", priority=1), user_id)
+    await create_record(db, StudyRecordCreate(task_id=task.id, record_date=date(2024, 1, 1), duration=30), user_id)
+    
+    assert not await delete_task(db, task.id, user_id + 1)
+    assert await _task_totals(db) == [(task.id, 30)]
+    assert await _daily_totals(db) == [(date(2024, 1, 1), 30, 1)]
+    assert len((await db.execute(select(StudyRecord.id))).all()) == 1
@@ -0,0 +1,53 @@
+import pytest
+
+from app.core import security
+from app.core.security import build_crypt_context, get_password_hash, verify_password, verify_and_rehash_password
+
+LONG_PASSWORD = "correct horse battery staple " * 3  # 87个字符，超过bcrypt的72字节限制
+
+
+@pytest.fixture
+def use_schemes(monkeypatch):
+    """切换当前使用的哈希方案（使用最低成本参数以加快测试）"""
+    def use(*schemes):
+        context = build_crypt_context(list(schemes), {"bcrypt": 4, "pbkdf2_sha256": 1000})
+        monkeypatch.setattr(security, "pwd_context", context)
+    return use
+
+
+@pytest.mark.parametrize("scheme", ["bcrypt", "pbkdf2_sha256"])
+def test_long_password_round_trip(use_schemes, scheme):
+    use_schemes(scheme)
+    hashed = get_password_hash(LONG_PASSWORD)
+    assert verify_password(LONG_PASSWORD, hashed)
+    assert not verify_password("x" + LONG_PASSWORD[1:], hashed)
+
+
+def test_pbkdf2_uses_full_password(use_schemes):
+    use_schemes("pbkdf2_sha256")
+    hashed = get_password_hash(LONG_PASSWORD)
+    assert not verify_password(LONG_PASSWORD[:72], hashed)
+
+
+def test_non_ascii_password_truncated_by_bytes_for_bcrypt(use_schemes):
+    use_schemes("bcrypt")
+    password = "密码" * 30  # 180字节
+    hashed = get_password_hash(password)
+    assert verify_password(password, hashed)
+    # 旧版本按字符截断后再哈希，bcrypt实际使用的前72字节相同
+    assert verify_password(password[:72], hashed)
+
+
+def test_long_password_survives_scheme_migration(use_schemes):
+    use_schemes("bcrypt")
+    old_hash = get_password_hash(LONG_PASSWORD)
+    
+    use_schemes("pbkdf2_sha256", "bcrypt")
+    ok, new_hash = verify_and_rehash_password(LONG_PASSWORD, old_hash)
+    assert ok and new_hash is not None
+    assert security.pwd_context.identify(new_hash) == "pbkdf2_sha256"
+    
+    # 重新哈希后仍可使用完整密码登录，且不再需要更新
+    ok, again = verify_and_rehash_password(LONG_PASSWORD, new_hash)
+    assert ok and again is None
+    assert not verify_password(LONG_PASSWORD[:72], new_hash)
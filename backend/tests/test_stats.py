@@ -0,0 +1,81 @@
+import pytest
+from datetime import date
+
+from app.crud.record import create_record, create_records_bulk, update_record, delete_record
+from app.crud.rollup import rebuild_daily_totals, rebuild_task_totals
+from app.crud.task import create_task
+from app.schemas.record import StudyRecordCreate, StudyRecordUpdate
+from app.schemas.task import TaskCreate
+from app.services.stats import get_daily_stats, get_task_stats, get_total_stats, get_combined_stats
+
+pytestmark = pytest.mark.anyio
+
+START, END = date(2024, 1, 1), date(2024, 1, 31)
+
+
+@pytest.fixture
+async def tasks(db, user_id):
+    math = await create_task(db, TaskCreate(title="math", priority=2), user_id)
+    physics = await create_task(db, TaskCreate(title="physics", priority=1), user_id)
+    # 同一天同一任务的多条记录在汇总表中累加到同一行
+    await create_records_bulk(db, [
+        StudyRecordCreate(task_id=math.id, record_date=date(2024, 1, 1), duration=30),
+        StudyRecordCreate(task_id=math.id, record_date=date(2024, 1, 1), duration=20),
+        StudyRecordCreate(task_id=physics.id, record_date=date(2024, 1, 2), duration=25),
+    ], user_id)
+    await create_record(db, StudyRecordCreate(task_id=physics.id, record_date=date(2024, 1, 2), duration=25), user_id)
+    return math, physics
+
+
+async def _stats(db, user_id):
+    return (
+        await get_daily_stats(db, user_id, START, END),
+        await get_task_stats(db, user_id, START, END),
+        await get_total_stats(db, user_id, START, END),
+    )
+
+
+async def test_stats_from_rollups(db, user_id, tasks):
+    math, physics = tasks
+    daily, task_stats, total = await _stats(db, user_id)
+
+    assert [(stat.date, stat.total_minutes) for stat in daily] == [(date(2024, 1, 1), 50), (date(2024, 1, 2), 50)]
+    assert {(stat.task_id, stat.minutes, stat.percentage) for stat in task_stats} == {
+        (math.id, 50, 50.0), (physics.id, 50, 50.0)
+    }
+    assert (total.total_minutes, total.total_days, total.average_minutes_per_day) == (100, 2, 50.0)
+
+
+async def test_combined_stats_match_separate_queries(db, user_id, tasks):
+    daily, task_stats, total = await _stats(db, user_id)
+    combined = await get_combined_stats(db, user_id, START, END)
+
+    assert combined.daily == daily
+    assert sorted(combined.tasks, key=lambda stat: stat.task_id) == sorted(task_stats, key=lambda stat: stat.task_id)
+    assert combined.total == total
+
+
+async def test_update_and_delete_keep_rollups_consistent(db, user_id, tasks):
+    math, physics = tasks
+    record = await create_record(
+        db, StudyRecordCreate(task_id=math.id, record_date=date(2024, 1, 3), duration=10), user_id
+    )
+    await update_record(db, record.id, StudyRecordUpdate(task_id=physics.id, record_date=date(2024, 1, 4)), user_id)
+    await delete_record(db, record.id, user_id)
+    before = await _stats(db, user_id)
+
+    # 由学习记录全量重建的汇总表与增量维护的结果一致
+    await rebuild_daily_totals(db, user_id)
+    await rebuild_task_totals(db, user_id)
+    await db.commit()
+    assert await _stats(db, user_id) == before
+    assert before[2].total_minutes == 100
+
+
+async def test_empty_range(db, user_id):
+    daily, task_stats, total = await _stats(db, user_id)
+    assert daily == [] and task_stats == []
+    assert (total.total_minutes, total.total_days, total.average_minutes_per_day) == (0, 0, 0.0)
+
+    combined = await get_combined_stats(db, user_id, START, END)
+    assert combined.daily == [] and combined.tasks == [] and combined.total == total
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.services import stats
+from app.services.stats import get_cached_stats, invalidate_user_stats, stats_cache
+
+pytestmark = pytest.mark.anyio
+
+RANGE = {"start_date": "2024-01-01", "end_date": "2024-01-31"}
+TOTAL_URL = f"{settings.API_V1_STR}/stats/total"
+TASK_STATS_URL = f"{settings.API_V1_STR}/stats/task"
+TASKS_URL = f"{settings.API_V1_STR}/tasks/"
+RECORDS_URL = f"{settings.API_V1_STR}/records/"
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """各测试的用户ID相同，每个测试使用空的统计缓存"""
+    stats_cache.clear()
+    yield
+    stats_cache.clear()
+
+
+@pytest.fixture
+async def task_id(client):
+    response = await client.post(TASKS_URL, json={"title": "math", "priority": 1})
+    return response.json()["id"]
+
+
+async def _add_record(client, task_id: int, duration: int = 10) -> int:
+    response = await client.post(RECORDS_URL, json={"task_id": task_id, "record_date": "2024-01-02", "duration": duration})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+async def _total_minutes(client) -> int:
+    return (await client.get(TOTAL_URL, params=RANGE)).json()["total_minutes"]
+
+
+async def test_repeated_request_is_served_from_cache(client, task_id):
+    await _add_record(client, task_id)
+    assert await _total_minutes(client) == 10
+    hits = stats_cache.hits
+    assert await _total_minutes(client) == 10
+    assert stats_cache.hits == hits + 1
+
+
+async def test_record_create_invalidates(client, task_id):
+    await _add_record(client, task_id)
+    assert await _total_minutes(client) == 10
+    await _add_record(client, task_id, duration=5)
+    assert await _total_minutes(client) == 15
+
+
+async def test_record_update_invalidates(client, task_id):
+    record_id = await _add_record(client, task_id)
+    assert await _total_minutes(client) == 10
+    response = await client.put(f"{RECORDS_URL}{record_id}", json={"duration": 25})
+    assert response.status_code == 200
+    assert await _total_minutes(client) == 25
+
+
+async def test_record_delete_invalidates(client, task_id):
+    record_id = await _add_record(client, task_id)
+    assert await _total_minutes(client) == 10
+    response = await client.delete(f"{RECORDS_URL}{record_id}")
+    assert response.status_code == 204
+    assert await _total_minutes(client) == 0
+
+
+async def test_bulk_insert_invalidates(client, task_id):
+    assert await _total_minutes(client) == 0
+    item = {"task_id": task_id, "record_date": "2024-01-03", "duration": 7}
+    response = await client.post(f"{RECORDS_URL}bulk", json=[item, item])
+    assert response.status_code == 200
+    assert await _total_minutes(client) == 14
+
+
+async def test_task_rename_invalidates(client, task_id):
+    await _add_record(client, task_id)
+    assert (await client.get(TASK_STATS_URL, params=RANGE)).json()[0]["task_title"] == "math"
+    response = await client.put(f"{TASKS_URL}{task_id}", json={"title": "physics"})
+    assert response.status_code == 200
+    assert (await client.get(TASK_STATS_URL, params=RANGE)).json()[0]["task_title"] == "physics"
+
+
+async def test_task_delete_invalidates(client, task_id):
+    await _add_record(client, task_id)
+    assert await _total_minutes(client) == 10
+    response = await client.delete(f"{TASKS_URL}{task_id}")
+    assert response.status_code == 204
+    assert await _total_minutes(client) == 0
+    assert (await client.get(RECORDS_URL)).json() == []
+
+
+async def test_result_computed_before_invalidation_is_not_cached():
+    started, release = asyncio.Event(), asyncio.Event()
+
+    async def slow_loader():
+        started.set()
+        await release.wait()
+        return "stale"
+
+    load = asyncio.create_task(get_cached_stats(1, "total", None, None, slow_loader))
+    await started.wait()
+    invalidate_user_stats(1)
+    release.set()
+    # 失效前开始的计算照常返回给调用方，但不写入缓存
+    assert await load == "stale"
+    assert stats_cache.get((1, "total", None, None)) is None
+
+    async def fresh_loader():
+        return "fresh"
+
+    assert await get_cached_stats(1, "total", None, None, fresh_loader) == "fresh"
+    assert stats_cache.get((1, "total", None, None)) == "fresh"
+
+
+async def test_pending_loads_do_not_accumulate():
+    async def loader():
+        return 1
+
+    for user_id in range(100):
+        await get_cached_stats(user_id, "total", None, None, loader)
+        invalidate_user_stats(user_id)
+    assert stats._pending_loads == {}
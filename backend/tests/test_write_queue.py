@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import settings
+from app.db import writer
+from app.db.base import Base
+from app.db.session import _register_sqlite_explicit_begin
+from app.db.writer import _WriteQueue, run_write
+from app.models.task import Task
+from app.models.user import User
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def session_factory(empty_engine):
+    """与开启写入队列时的应用引擎配置相同：SQLite 由SQLAlchemy显式BEGIN，SAVEPOINT才在外层事务之内"""
+    if empty_engine.dialect.name == "sqlite":
+        _register_sqlite_explicit_begin(empty_engine)
+    async with empty_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User).values(id=1, username="alice", email="alice@example.com", password_hash="x"))
+    return async_sessionmaker(empty_engine, expire_on_commit=False)
+
+
+@pytest.fixture
+async def queue(session_factory):
+    write_queue = _WriteQueue(session_factory, max_batch=10)
+    yield write_queue
+    await write_queue.stop()
+
+
+def add_task(title: str, fail: bool = False):
+    """插入一个任务的写操作单元，fail 时在写入后抛出异常"""
+    async def write(session):
+        result = await session.execute(insert(Task).values(user_id=1, title=title, priority=1).returning(Task.id))
+        if fail:
+            raise ValueError(title)
+        return result.scalar()
+    return write
+
+
+async def _titles(session_factory):
+    async with session_factory() as db:
+        return sorted((await db.execute(select(Task.title))).scalars().all())
+
+
+async def test_queued_writes_commit_in_one_batch(queue, session_factory):
+    ids = await asyncio.gather(*(queue.submit(add_task(f"task {index}")) for index in range(3)))
+
+    assert len(set(ids)) == 3
+    assert (queue.batches, queue.largest_batch, queue.writes) == (1, 3, 3)
+    assert await _titles(session_factory) == ["task 0", "task 1", "task 2"]
+
+
+async def test_failed_write_rolls_back_only_itself(queue, session_factory):
+    results = await asyncio.gather(
+        queue.submit(add_task("first")),
+        queue.submit(add_task("broken", fail=True)),
+        queue.submit(add_task("last")),
+        return_exceptions=True
+    )
+
+    # 失败的写操作把异常抛给其调用方，同批的其他写操作照常提交
+    assert isinstance(results[1], ValueError)
+    assert isinstance(results[0], int) and isinstance(results[2], int)
+    assert (queue.batches, queue.writes, queue.failed) == (1, 2, 1)
+    assert await _titles(session_factory) == ["first", "last"]
+
+
+async def test_stop_drains_pending_writes(queue, session_factory):
+    pending = [asyncio.create_task(queue.submit(add_task(f"task {index}"))) for index in range(5)]
+    # 让各写操作进入队列，但写入任务尚未处理
+    await asyncio.sleep(0)
+
+    await queue.stop()
+    assert all(task.done() and task.exception() is None for task in pending)
+    assert len(await _titles(session_factory)) == 5
+
+
+async def test_run_write_writes_directly_when_queue_disabled(session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "DB_WRITE_QUEUE", False)
+
+    async def unexpected_submit(fn):
+        raise AssertionError("write queue used while disabled")
+
+    monkeypatch.setattr(writer.write_queue, "submit", unexpected_submit)
+    async with session_factory() as db:
+        await run_write(db, add_task("direct"))
+        # 失败的写操作整体回滚
+        with pytest.raises(ValueError):
+            await run_write(db, add_task("broken", fail=True))
+    assert await _titles(session_factory) == ["direct"]
+
+
+async def test_run_write_uses_queue_when_enabled(session_factory, monkeypatch):
+    queue = _WriteQueue(session_factory, max_batch=10)
+    monkeypatch.setattr(settings, "DB_WRITE_QUEUE", True)
+    monkeypatch.setattr(writer, "write_queue", queue)
+    try:
+        async with session_factory() as db:
+            await run_write(db, add_task("queued"))
+    finally:
+        await queue.stop()
+    assert queue.batches == 1
+    assert await _titles(session_factory) == ["queued"]